@@ -0,0 +1,268 @@
+"""
+    replay_browse_traffic.py
+    Management command that replays recorded browse URLs (search_by, filter_name, filter_value, sort_by, page, ...) with
+    Django's test client and reports latency percentiles, throughput and queries per request.
+    The log file can hold one URL per line or access log lines (the request path of each line is used).
+"""
+import json
+import math
+import re
+import threading
+import time
+import traceback
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import django
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from search_filter_sort.utils.misc import class_strings_to_class
+
+ACCESS_LOG_REQUEST_REGEX = re.compile(r'"([A-Z]+) (\S+) HTTP/')
+REPLAYED_METHODS = ["GET", "HEAD"]
+
+_worker_state = threading.local()
+_worker_options = {}
+
+
+def read_urls(log_file, base_path):
+    urls = []
+
+    with open(log_file) as log:
+        for line in log:
+            line = line.strip()
+
+            if not line or line.startswith("#"):
+                continue
+
+            match = ACCESS_LOG_REQUEST_REGEX.search(line)
+
+            if match:
+                # Writes (bulk actions, ...) can't be replayed as reads
+                if match.group(1) not in REPLAYED_METHODS:
+                    continue
+
+                url = match.group(2)
+            else:
+                url = line.split()[0]
+
+                # Anything else that isn't a path or a query string isn't a URL
+                if not url.startswith(("/", "?")):
+                    continue
+
+            # Lines that are only a query string are replayed against the base path
+            if url.startswith("?"):
+                url = base_path + url
+
+            urls.append(url)
+
+    return urls
+
+
+def percentile(sorted_values, percent):
+    # Nearest rank percentile
+    if not sorted_values:
+        return 0
+
+    rank = max(int(math.ceil(percent * len(sorted_values) / 100.0)) - 1, 0)
+
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _initialize_worker(options):
+    # Used as the process pool initializer. Under the spawn start method the process starts without Django set up.
+    if not apps.ready:
+        django.setup()
+
+    _worker_options.update(options)
+
+
+def _get_worker_client():
+    if getattr(_worker_state, "client", None) is None:
+        view_path = _worker_options.get("view", None)
+        username = _worker_options.get("username", None)
+        host = _worker_options.get("host", None)
+        user = get_user_model().objects.get_by_natural_key(username) if username else None
+
+        if view_path:
+            module_path, class_name = view_path.rsplit(".", 1)
+            _worker_state.view = class_strings_to_class(module_path, class_name).as_view()
+            _worker_state.client = RequestFactory(HTTP_HOST=host)
+        else:
+            _worker_state.view = None
+            _worker_state.client = Client(HTTP_HOST=host)
+
+            if user is not None:
+                _worker_state.client.force_login(user)
+
+        _worker_state.user = user
+
+    return _worker_state.client
+
+
+def replay_url(url):
+    client = _get_worker_client()
+    contexts = [CaptureQueriesContext(connections[alias]) for alias in connections]
+
+    for context in contexts:
+        context.__enter__()
+
+    start = time.perf_counter()
+    error = None
+
+    try:
+        if _worker_state.view is not None:
+            request = client.get(url)
+
+            if _worker_state.user is not None:
+                request.user = _worker_state.user
+
+            response = _worker_state.view(request)
+
+            if hasattr(response, "render"):
+                response.render()
+        else:
+            response = client.get(url)
+
+        status_code = response.status_code
+    except Exception as e:
+        status_code = None
+        # Sent back as strings since process pool results have to be pickled
+        error = (type(e).__name__, traceback.format_exc())
+    finally:
+        latency = time.perf_counter() - start
+
+        for context in contexts:
+            context.__exit__(None, None, None)
+
+    return latency, sum(len(context.captured_queries) for context in contexts), status_code, error
+
+
+class Command(BaseCommand):
+    help = "Replays recorded browse URLs and reports latency percentiles, throughput and queries per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("log_file", help="File with one browse URL or access log line per line")
+        parser.add_argument(
+            "--base-path",
+            dest="base-path",
+            default="/",
+            help="Path used for lines that only contain a query string"
+        )
+        parser.add_argument(
+            "--view",
+            dest="view",
+            default=None,
+            help="Dotted path of a BaseBrowseView subclass to call directly instead of resolving the URLs"
+        )
+        parser.add_argument("--username", dest="username", default=None, help="User to log in as")
+        parser.add_argument(
+            "--host",
+            dest="host",
+            default=None,
+            help="Host header to send (defaults to the first entry of ALLOWED_HOSTS that isn't a wildcard)"
+        )
+        parser.add_argument("--workers", dest="workers", type=int, default=4, help="Number of concurrent workers")
+        parser.add_argument(
+            "--pool",
+            dest="pool",
+            choices=["thread", "process"],
+            default="thread",
+            help="Run the workers in a thread pool or a process pool"
+        )
+        parser.add_argument("--repeat", dest="repeat", type=int, default=1, help="Number of times to replay the log")
+        parser.add_argument(
+            "--warmup",
+            dest="warmup",
+            type=int,
+            default=0,
+            help="Number of requests to send before measuring"
+        )
+        parser.add_argument("--json", action="store_true", dest="json", default=False, help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            urls = read_urls(options["log_file"], options["base-path"]) * options["repeat"]
+        except IOError as e:
+            raise CommandError("Could not read {log_file}: {error}".format(log_file=options["log_file"], error=e))
+
+        if not urls:
+            raise CommandError("No URLs found in " + options["log_file"])
+
+        worker_options = {"view": options["view"], "username": options["username"], "host": options["host"]}
+
+        if not worker_options["host"]:
+            allowed_hosts = [host for host in settings.ALLOWED_HOSTS if "*" not in host and not host.startswith(".")]
+            worker_options["host"] = allowed_hosts[0] if allowed_hosts else "localhost"
+
+        if options["pool"] == "process":
+            # Forked processes must not share the parent's database connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options["workers"], initializer=_initialize_worker, initargs=(worker_options,)
+            )
+        else:
+            _initialize_worker(worker_options)
+            executor = ThreadPoolExecutor(max_workers=options["workers"])
+
+        with executor:
+            list(executor.map(replay_url, urls[:options["warmup"]]))
+
+            start = time.perf_counter()
+            results = list(executor.map(replay_url, urls))
+            elapsed = time.perf_counter() - start
+
+        report = self.build_report(results, elapsed)
+        errors = [result[3] for result in results if result[3] is not None]
+
+        if errors:
+            self.stderr.write("First of {count} exceptions:\n{traceback}".format(count=len(errors), traceback=errors[0][1]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=4))
+        else:
+            self.write_report(report)
+
+    def build_report(self, results, elapsed):
+        latencies = sorted(result[0] * 1000 for result in results)
+        query_counts = sorted(result[1] for result in results)
+        status_codes = [result[2] for result in results]
+        exception_counts = Counter(result[3][0] for result in results if result[3] is not None)
+
+        return {
+            "requests": len(results),
+            "errors": len([status_code for status_code in status_codes if status_code is None or status_code >= 400]),
+            "redirects": len([status_code for status_code in status_codes if status_code and 300 <= status_code < 400]),
+            "exceptions": dict(exception_counts),
+            "elapsed_seconds": elapsed,
+            "requests_per_second": len(results) / elapsed if elapsed else 0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1]
+            },
+            "queries_per_request": {
+                "mean": sum(query_counts) / float(len(query_counts)),
+                "p95": percentile(query_counts, 95),
+                "max": query_counts[-1]
+            }
+        }
+
+    def write_report(self, report):
+        self.stdout.write("Requests: {requests} ({errors} errors, {redirects} redirects)".format(**report))
+
+        for exception_name, count in sorted(report["exceptions"].items(), key=lambda item: -item[1]):
+            self.stdout.write("    {exception_name}: {count}".format(exception_name=exception_name, count=count))
+
+        self.stdout.write("Throughput: {requests_per_second:.1f} requests/s over {elapsed_seconds:.2f}s".format(**report))
+        self.stdout.write("Latency (ms): p50 {p50:.1f}, p95 {p95:.1f}, p99 {p99:.1f}, max {max:.1f}".format(**report["latency_ms"]))
+        self.stdout.write("Queries per request: mean {mean:.1f}, p95 {p95}, max {max}".format(**report["queries_per_request"]))
@@ -6,6 +6,7 @@ var range_filters = {};
 var sort_bys = [];
 var paginate_by = [];
 var page_number = 1;
+var lazy_filter_max_options = 500;  // Past this the user has to narrow the options down with the filter's search
 
 // default_pagination comes in via django and must be set before including this file
 function initialize_search_filter_sort() {
@@ -57,6 +58,7 @@ function initialize_search_filter_sort() {
 
     set_filter_mousedown_functions();
     set_filter_keydown_functions();
+    initialize_lazy_filters();
     get_url_parameters(search_bys, "search_by");
     get_filter_by_parameters();  // Also sets original_filter_bys
     get_url_parameters(sort_bys, "sort_by");
@@ -126,9 +128,8 @@ function set_filter_mousedown_functions() {
         // This is necessary to fix "click and drag scrolling on the options" bug in Chrome
     }).mousemove(function(e) {e.preventDefault();});
 
-    var options = $("select.multi-select.sfs-filter option");
-
-    options.click(function() {
+    // Delegated so there is one handler per select instead of one per option, and so lazily loaded options work too
+    $("select.multi-select.sfs-filter").on("click", "option", function() {
         var scroll = select.scrollTop;
         filter_name = $(this).parent().attr("name").split("_filter")[0];
         filter_quantity_span = $("#" + filter_name + "_quantity_span");
@@ -167,6 +168,84 @@ function set_filter_mousedown_functions() {
     });
 }
 
+function initialize_lazy_filters() {
+    $("select.sfs-lazy-filter").each(function() {
+        var lazy_select = $(this);
+        var search_timeout = null;
+
+        reset_lazy_filter(lazy_select);
+        lazy_select.data("opened", false);
+
+        // Nothing is loaded until the user actually goes to use the filter. Both events usually fire, but only the first
+        // one loads anything (the scroll handler takes care of the later pages).
+        lazy_select.on("mouseenter focus", function() {
+            if(!lazy_select.data("opened")) {
+                lazy_select.data("opened", true);
+                load_lazy_filter_options(lazy_select);
+            }
+        });
+
+        lazy_select.scroll(function() {
+            if(this.scrollTop + this.clientHeight >= this.scrollHeight - 20) {
+                load_lazy_filter_options(lazy_select);
+            }
+        });
+
+        $("#" + lazy_select.attr("id") + "_search").on("input", function() {
+            clearTimeout(search_timeout);
+
+            search_timeout = setTimeout(function() {
+                lazy_select.find("option:not(:selected)").remove();
+                reset_lazy_filter(lazy_select);
+                load_lazy_filter_options(lazy_select);
+            }, 300);
+        });
+    });
+}
+
+function reset_lazy_filter(lazy_select) {
+    lazy_select.data("options_page", 0);
+    lazy_select.data("has_more", true);
+    lazy_select.data("loading", false);
+    lazy_select.data("request_number", (lazy_select.data("request_number") || 0) + 1);
+}
+
+function load_lazy_filter_options(lazy_select) {
+    var request_number = lazy_select.data("request_number");
+    var options_page = lazy_select.data("options_page") + 1;
+
+    if(lazy_select.data("loading") || !lazy_select.data("has_more")) {
+        return;
+    }
+
+    lazy_select.data("loading", true);
+
+    $.getJSON(lazy_select.data("options-url"), {
+        options_search: $("#" + lazy_select.attr("id") + "_search").val(),
+        options_page: options_page
+    }, function(response) {
+        var i;
+        var selected_values = lazy_select.val() || [];
+
+        if(request_number !== lazy_select.data("request_number")) { // The search changed while this was loading
+            return;
+        }
+
+        for (i = 0; i < response.results.length; i++) {
+            if(selected_values.indexOf(response.results[i].value) === -1) { // Selected options are already rendered
+                lazy_select.append($("<option></option>").val(response.results[i].value).text(response.results[i].label));
+            }
+        }
+
+        lazy_select.data("options_page", options_page);
+        // Stop growing the select at some point, since every option stays in the DOM
+        lazy_select.data("has_more", response.has_more && lazy_select.children("option").length < lazy_filter_max_options);
+        lazy_select.data("loading", false);
+    }).fail(function() {
+        lazy_select.data("loading", false);
+    });
+}
+
 function set_filter_keydown_functions() {
     var input_length;
     var filter_name;
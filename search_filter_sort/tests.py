@@ -1,3 +1,756 @@
-from django.test import TestCase
+import datetime
+import json
+import os
+import tempfile
 
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import Group, User
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.db.models import Count, F
+from django.db.models.functions import Cast
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone, translation
+
+from search_filter_sort.management.commands.replay_browse_traffic import percentile, read_urls
+from search_filter_sort.utils.browse_query import PSYCOPG_FOUND, BrowseQuery, classify_search_term
+from search_filter_sort.utils.constants import LazyFilterParameters, PostgresRangeQueryFilterTypes, RangeFilterTypes, \
+    SearchStrategies, SearchTermTypes, SessionKeys
+from search_filter_sort.utils.misc import mark_recent_write
+from search_filter_sort.utils import prefetch
+from search_filter_sort.utils.pagination import WindowCountPaginator
+from search_filter_sort.utils.postgres_ranges import create_multirange_lookup, merge_ranges, range_to_literal
+from search_filter_sort.utils.row_cache import render_cached_rows
+from search_filter_sort.views.class_based.BaseBrowseView import BaseBrowseView
+
+
+class ReplicaUserBrowseView(BaseBrowseView):
+    model = User
+    sorts = ["username"]
+    using = "replica"
+    primary_using = "default"
+
+
+class BrowseDatabaseRoutingTestCase(TestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        # Only written to the primary, as if the replica hadn't caught up yet
+        User.objects.using("default").create(username="primary_only")
+        self.request = RequestFactory().get("/")
+        self.request.session = SessionStore()
+
+    def get_browsed_usernames(self):
+        view = ReplicaUserBrowseView()
+        view.setup(self.request)
+
+        return [user.username for user in view.get_queryset()]
+
+    def test_reads_use_the_browse_database(self):
+        self.assertEqual(self.get_browsed_usernames(), [])
+
+    def test_reads_use_the_primary_database_after_a_write(self):
+        mark_recent_write(self.request)
+
+        self.assertEqual(self.get_browsed_usernames(), ["primary_only"])
+
+    def test_reads_go_back_to_the_browse_database_after_the_window(self):
+        mark_recent_write(self.request)
+        self.request.session[SessionKeys.LAST_WRITE] -= ReplicaUserBrowseView.read_your_writes_seconds + 1
+
+        self.assertEqual(self.get_browsed_usernames(), [])
+
+
+class LazyUserFilterBrowseView(BaseBrowseView):
+    model = User
+    sorts = ["username"]
+    lazy_filters = {"id": {"model": User, "label_field": "username", "page_size": 2}}
+
+    def define_filters(self):
+        raise AssertionError("Option requests must not build every filter")
+
+
+class LazyFilterOptionsTestCase(TestCase):
+    def setUp(self):
+        for username in ["ann", "bob", "cid"]:
+            User.objects.create(username=username)
+
+    def get_options(self, **parameters):
+        parameters[LazyFilterParameters.FILTER_NAME] = "id"
+        response = LazyUserFilterBrowseView.as_view()(RequestFactory().get("/", parameters))
+
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    def test_options_are_paged_without_defining_the_other_filters(self):
+        status_code, options = self.get_options()
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual([option["label"] for option in options["results"]], ["ann", "bob"])
+        self.assertTrue(options["has_more"])
+
+        status_code, options = self.get_options(**{LazyFilterParameters.PAGE: 2})
+
+        self.assertEqual([option["label"] for option in options["results"]], ["cid"])
+        self.assertFalse(options["has_more"])
+
+    def test_options_are_searched(self):
+        status_code, options = self.get_options(**{LazyFilterParameters.SEARCH: "o"})
+
+        self.assertEqual([option["label"] for option in options["results"]], ["bob"])
+
+    def test_unknown_lazy_filter(self):
+        response = LazyUserFilterBrowseView.as_view()(RequestFactory().get("/", {LazyFilterParameters.FILTER_NAME: "nope"}))
+
+        self.assertEqual(response.status_code, 404)
+
+
+ROW_TEMPLATES = [{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "OPTIONS": {
+        "loaders": [("django.template.loaders.locmem.Loader", {"row.html": "<td>{{ item.username }}{{ user }}</td>"})],
+        "context_processors": ["django.contrib.auth.context_processors.auth"]
+    }
+}]
+
+
+@override_settings(TEMPLATES=ROW_TEMPLATES)
+class RowCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="ann", last_login=timezone.now())
+
+    def render_rows(self, **kwargs):
+        with mock.patch("search_filter_sort.utils.row_cache.render_to_string", wraps=render_to_string) as mock_render:
+            rows = render_cached_rows("row.html", [self.user], modification_field="last_login", **kwargs)
+
+        return rows, mock_render.call_count
+
+    def test_unchanged_row_is_a_cache_hit(self):
+        self.assertEqual(self.render_rows(), (["<td>ann</td>"], 1))
+        self.assertEqual(self.render_rows(), (["<td>ann</td>"], 0))
+
+    def test_changed_stamp_is_a_cache_miss(self):
+        self.render_rows()
+        self.user.username = "bob"
+        self.user.last_login += datetime.timedelta(seconds=1)
+
+        self.assertEqual(self.render_rows(), (["<td>bob</td>"], 1))
+
+    def test_changed_language_or_timezone_is_a_cache_miss(self):
+        self.render_rows()
+
+        with translation.override("es-mx"):
+            self.assertEqual(self.render_rows()[1], 1)
+
+        with timezone.override("Asia/Tokyo"):
+            self.assertEqual(self.render_rows()[1], 1)
+
+    def test_rows_without_a_stamp_are_not_cached(self):
+        self.user.last_login = None
+        self.render_rows()
+
+        self.assertEqual(self.render_rows()[1], 1)
+
+    def test_view_rows_are_rendered_without_the_request(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        view = RowUserBrowseView()
+        view.setup(request)
+
+        self.assertEqual(view.get_rendered_rows([self.user]), ["<td>ann</td>"])
+
+        view.render_rows_with_request = True
+
+        self.assertEqual(view.get_rendered_rows([self.user]), ["<td>annann</td>"])
+
+
+class RowUserBrowseView(BaseBrowseView):
+    model = User
+    row_template_name = "row.html"
+    row_cache_modification_field = "last_login"
+
+
+class OverridingUserBrowseView(BaseBrowseView):
+    model = User
+    sorts = ["username"]
+
+    def get_sort_list(self, sort_bys):
+        self.sort_list_calls = getattr(self, "sort_list_calls", 0) + 1
+
+        return super(OverridingUserBrowseView, self).get_sort_list(sort_bys)
+
+    def convert_values(self, values, range_type):
+        # Filter on the usernames' ids
+        if range_type is None:
+            values = [User.objects.get(username=value).pk for value in values]
+
+        return super(OverridingUserBrowseView, self).convert_values(values, range_type)
+
+
+class BrowseQueryTestCase(TestCase):
+    def setUp(self):
+        for username in ["ann", "bob", "cid"]:
+            User.objects.create(username=username)
+
+    def test_run_with_a_plain_dict(self):
+        browse_query = BrowseQuery(User, sorts=["username"])
+        result = browse_query.run({"search_by": "b", "sort_by": ["-username"]})
+
+        self.assertEqual([user.username for user in result.queryset], ["bob"])
+        self.assertEqual(result.search_by, "b")
+        self.assertEqual((result.filtered_object_count, result.total_object_count), (1, 3))
+
+        result = browse_query.run({"filter_name": "username", "filter_value": "ann,cid", "sort_by": "-username"})
+
+        self.assertEqual([user.username for user in result.queryset], ["cid", "ann"])
+        self.assertTrue(result.using_filters)
+
+    def test_view_overrides_are_used(self):
+        view = OverridingUserBrowseView()
+        view.setup(RequestFactory().get("/", {"filter_name": "id", "filter_value": "ann,bob", "sort_by": "-username"}))
+
+        self.assertEqual([user.username for user in view.get_queryset()], ["bob", "ann"])
+        self.assertEqual(view.sort_list_calls, 1)
+        self.assertEqual(view.convert_values(["5"], RangeFilterTypes.NUMBER), [5])
+
+    def test_filtered_object_count_after_get_queryset(self):
+        view = OverridingUserBrowseView()
+        view.setup(RequestFactory().get("/", {"search_by": "b"}))
+        view.get_queryset()
+
+        self.assertEqual(view.filtered_object_count, 1)
+
+    def test_names_still_importable_from_the_view_module(self):
+        from search_filter_sort.views.class_based import BaseBrowseView as base_browse_view_module
+
+        for name in ["USER_SEARCH_LIST", "PSYCOPG_FOUND", "TimestamptzRange", "NumericRange"]:
+            self.assertTrue(hasattr(base_browse_view_module, name), name)
+
+
+class ReplayBrowseTrafficTestCase(SimpleTestCase):
+    def read_log(self, lines):
+        with tempfile.NamedTemporaryFile("w", suffix=".log", delete=False) as log:
+            log.write("\n".join(lines))
+
+        try:
+            return read_urls(log.name, "/users/")
+        finally:
+            os.remove(log.name)
+
+    def test_read_urls(self):
+        urls = self.read_log([
+            "# Comment",
+            "",
+            "/users/?search_by=ann",
+            "?sort_by=-username&page=2",
+            '127.0.0.1 - - [19/Oct/2026:10:00:00 +0000] "GET /users/?page=3 HTTP/1.1" 200 512',
+            '127.0.0.1 - - [19/Oct/2026:10:00:01 +0000] "HEAD /users/ HTTP/1.1" 200 0',
+            '127.0.0.1 - - [19/Oct/2026:10:00:02 +0000] "POST /users/bulk_delete/ HTTP/1.1" 302 0',
+            "127.0.0.1 something that is not a URL"
+        ])
+
+        self.assertEqual(urls, [
+            "/users/?search_by=ann", "/users/?sort_by=-username&page=2", "/users/?page=3", "/users/"
+        ])
+
+    def test_percentile(self):
+        self.assertEqual(percentile([], 50), 0)
+        self.assertEqual(percentile([7], 99), 7)
+
+        values = list(range(1, 11))
+
+        self.assertEqual([percentile(values, percent) for percent in [50, 95, 99, 100]], [5, 10, 10, 10])
+
+        values = list(range(1, 101))
+
+        self.assertEqual([percentile(values, percent) for percent in [1, 50, 95, 99, 100]], [1, 50, 95, 99, 100])
+
+
+class SortListTestCase(SimpleTestCase):
+    def get_sort_list(self, sort_bys, sorts=None, sort_registry=None):
+        browse_query = BrowseQuery(User, sorts=sorts or [], sort_registry=sort_registry, searches=[], queryset=User.objects.none())
+
+        return [
+            (expression.expression.name, expression.descending, expression.nulls_first, expression.nulls_last)
+            for expression in browse_query.get_sort_list(sort_bys)
+        ]
+
+    def test_primary_key_tiebreaker_follows_the_last_sort(self):
+        self.assertEqual(self.get_sort_list(["username"], ["username"]), [
+            ("username", False, None, None), ("id", False, None, None)
+        ])
+        self.assertEqual(self.get_sort_list(["email", "-username"], ["username", "email"]), [
+            ("email", False, None, None), ("username", True, None, None), ("id", True, None, None)
+        ])
+
+    def test_primary_key_tiebreaker_is_not_repeated(self):
+        self.assertEqual(self.get_sort_list(["-id"], ["id"]), [("id", True, None, None)])
+        self.assertEqual(self.get_sort_list(["username", "pk"], ["username", "pk"]), [
+            ("username", False, None, None), ("pk", False, None, None)
+        ])
+
+    def test_unknown_sorts_only_get_the_tiebreaker(self):
+        self.assertEqual(self.get_sort_list(["-nope"], ["username"]), [("id", False, None, None)])
+
+    def test_descending_keeps_the_declared_nulls_position(self):
+        sort_registry = {"login": F("last_login").asc(nulls_last=True)}
+
+        self.assertEqual(self.get_sort_list(["login"], sort_registry=sort_registry), [
+            ("last_login", False, None, True), ("id", False, None, None)
+        ])
+        self.assertEqual(self.get_sort_list(["-login"], sort_registry=sort_registry), [
+            ("last_login", True, None, True), ("id", True, None, None)
+        ])
+
+    def test_last_name_and_birthday_sorts(self):
+        self.assertEqual(self.get_sort_list(["-last_name"], ["last_name"]), [
+            ("first_name", True, None, None), ("last_name", True, None, None), ("id", True, None, None)
+        ])
+        # Ascending age is descending birthday
+        self.assertEqual(self.get_sort_list(["birthday"], ["birthday"]), [
+            ("birthday", True, None, None), ("id", True, None, None)
+        ])
+
+
+@skipUnless(PSYCOPG_FOUND, "psycopg is not installed")
+class PostgresRangesTestCase(SimpleTestCase):
+    def setUp(self):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        # Only used to compile SQL, it never connects
+        settings_dict = dict(connections["default"].settings_dict)
+        settings_dict["ENGINE"] = "django.db.backends.postgresql"
+        self.connection = DatabaseWrapper(settings_dict, alias="postgres_sql_only")
+
+    def get_range(self, lower, upper, bounds="[]"):
+        from psycopg.types.range import NumericRange
+
+        return NumericRange(lower, upper, bounds=bounds)
+
+    def get_sql(self, lookup, pg_version=140000):
+        self.connection.__dict__["pg_version"] = pg_version
+        query = User.objects.filter(lookup).query
+
+        return query.get_compiler(connection=self.connection).compile(query.where)
+
+    def test_merge_overlapping_ranges(self):
+        self.assertEqual(merge_ranges([self.get_range(3, 10), self.get_range(1, 5)]), [self.get_range(1, 10)])
+        self.assertEqual(merge_ranges([self.get_range(1, 10), self.get_range(3, 5)]), [self.get_range(1, 10)])
+
+    def test_merge_adjacent_ranges(self):
+        self.assertEqual(merge_ranges([self.get_range(1, 5), self.get_range(5, 10, "()")]), [self.get_range(1, 10, "[)")])
+        # 5 is in neither range
+        self.assertEqual(
+            merge_ranges([self.get_range(1, 5, "[)"), self.get_range(5, 10, "()")]),
+            [self.get_range(1, 5, "[)"), self.get_range(5, 10, "()")]
+        )
+
+    def test_merge_unbounded_ranges(self):
+        self.assertEqual(merge_ranges([self.get_range(1, 5), self.get_range(None, 2)]), [self.get_range(None, 5, "(]")])
+        self.assertEqual(merge_ranges([self.get_range(1, 5), self.get_range(3, None)]), [self.get_range(1, None, "[)")])
+        self.assertEqual(merge_ranges([self.get_range(None, 1), self.get_range(9, None)]), [
+            self.get_range(None, 1, "(]"), self.get_range(9, None, "[)")
+        ])
+
+    def test_merge_drops_empty_ranges(self):
+        self.assertEqual(merge_ranges([self.get_range(5, 5, "()"), self.get_range(1, 2)]), [self.get_range(1, 2)])
+        self.assertEqual(merge_ranges([self.get_range(9, 3), self.get_range(5, 5)]), [self.get_range(5, 5)])
+
+    def test_range_to_literal(self):
+        self.assertEqual(range_to_literal(self.get_range(1, 5, "[)")), '["1","5")')
+        self.assertEqual(range_to_literal(self.get_range(None, 5, "(]")), '(,"5"]')
+
+    def test_scalar_column_uses_one_multirange(self):
+        lookup = create_multirange_lookup(
+            "id", PostgresRangeQueryFilterTypes.CONTAINED_BY, [self.get_range(1, 5), self.get_range(3, 10)],
+            RangeFilterTypes.NUMBER
+        )
+
+        self.assertEqual(self.get_sql(lookup), ('"auth_user"."id" <@ %s::int4multirange', ['{["1","10"]}']))
+        self.assertEqual(self.get_sql(lookup, pg_version=130000), ('("auth_user"."id" <@ %s::int4range)', ['["1","10"]']))
+
+    def test_range_column_contained_by_is_not_merged(self):
+        from django.contrib.postgres.fields import IntegerRangeField
+
+        ranges = [self.get_range(1, 5), self.get_range(3, 10)]
+        contained_by = create_multirange_lookup("id", PostgresRangeQueryFilterTypes.CONTAINED_BY, ranges, RangeFilterTypes.NUMBER)
+        contained_by.lhs = Cast("id", IntegerRangeField())
+        overlap = create_multirange_lookup("id", PostgresRangeQueryFilterTypes.OVERLAP, ranges, RangeFilterTypes.NUMBER)
+        overlap.lhs = Cast("id", IntegerRangeField())
+
+        self.assertEqual(self.get_sql(contained_by), (
+            '(("auth_user"."id")::int4range <@ %s::int4range OR ("auth_user"."id")::int4range <@ %s::int4range)',
+            ['["1","5"]', '["3","10"]']
+        ))
+        self.assertEqual(self.get_sql(overlap), ('("auth_user"."id")::int4range && %s::int4multirange', ['{["1","10"]}']))
+
+    def test_no_ranges(self):
+        lookup = create_multirange_lookup("id", PostgresRangeQueryFilterTypes.OVERLAP, [], RangeFilterTypes.NUMBER)
+
+        self.assertEqual(self.get_sql(lookup), ('"auth_user"."id" && %s::int4multirange', ['{}']))
+        self.assertEqual(self.get_sql(lookup, pg_version=130000), ("FALSE", []))
+
+
+class SearchRoutingTestCase(TestCase):
+    searches = [
+        ("id", SearchStrategies.NUMERIC), ("id", SearchStrategies.EXACT), ("email", SearchStrategies.IEXACT),
+        ("username", SearchStrategies.PREFIX)
+    ]
+
+    def setUp(self):
+        User.objects.create(id=1, username="ann", email="ann@example.com")
+        User.objects.create(id=2, username="1.5")
+        self.browse_query = BrowseQuery(User, sorts=["username"], searches=self.searches)
+
+    def search(self, term):
+        return [user.username for user in self.browse_query.run({"search_by": term}).queryset]
+
+    def test_classify_search_term(self):
+        text = SearchTermTypes.TEXT
+
+        self.assertEqual(classify_search_term("ann"), {text})
+        self.assertEqual(classify_search_term("-12"), {text, SearchTermTypes.NUMERIC, SearchTermTypes.INTEGER})
+        self.assertEqual(classify_search_term("1.5"), {text, SearchTermTypes.NUMERIC})
+        self.assertEqual(classify_search_term("ann@example.com"), {text, SearchTermTypes.EMAIL})
+        self.assertEqual(classify_search_term("12345678-1234-5678-1234-567812345678"), {text, SearchTermTypes.UUID})
+
+    def test_fields_are_skipped_for_terms_of_other_types(self):
+        self.assertEqual(self.browse_query.get_search_list("ann"), {"username__startswith": "ann"})
+        self.assertEqual(self.browse_query.get_search_list("ann@example.com"), {
+            "email__iexact": "ann@example.com", "username__startswith": "ann@example.com"
+        })
+        self.assertEqual(self.browse_query.get_search_list("2"), {"id__exact": 2, "username__startswith": "2"})
+
+    def test_non_integral_term_skips_integer_fields(self):
+        self.assertEqual(self.browse_query.get_search_list("1.5"), {"username__startswith": "1.5"})
+        self.assertEqual(self.search("1.5"), ["1.5"])
+
+    def test_out_of_range_integer_skips_integer_fields(self):
+        term = "9" * 30
+
+        self.assertEqual(self.browse_query.get_search_list(term), {"username__startswith": term})
+        self.assertEqual(self.search(term), [])
+
+    def test_exact_on_an_integer_field_skips_text(self):
+        browse_query = BrowseQuery(User, sorts=["username"], searches=[("id", SearchStrategies.EXACT)])
+
+        self.assertEqual(browse_query.get_search_list("abc"), {})
+
+    def test_no_matching_field_gives_an_empty_result(self):
+        browse_query = BrowseQuery(User, sorts=["username"], searches=[("id", SearchStrategies.NUMERIC)])
+
+        with self.assertNumQueries(0):
+            result = browse_query.run({"search_by": "abc"})
+            self.assertEqual(list(result.queryset), [])
+
+        self.assertEqual(result.search_by, "abc")
+
+    def test_view_keeps_the_search_for_unmatchable_terms(self):
+        class IdSearchBrowseView(BaseBrowseView):
+            model = User
+            sorts = ["username"]
+
+            def search_fields(self, class_object, list_of_used_classes):
+                return [("id", SearchStrategies.EXACT)]
+
+        for term in ["abc", "1.5", "9" * 30]:
+            view = IdSearchBrowseView()
+            view.setup(RequestFactory().get("/", {"search_by": term}))
+
+            self.assertEqual(list(view.get_queryset()), [])
+            self.assertEqual(view.search_by, term)
+
+
+class WindowCountPaginatorTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        groups = [Group.objects.create(name="group {}".format(i)) for i in range(2)]
+
+        for i in range(25):
+            user = User.objects.create(username="user {:02}".format(i))
+            # Most users are in both groups so a join on groups gives duplicate rows
+            user.groups.set(groups if i % 3 else groups[:1])
+
+    def get_pages(self, paginator_class, queryset, **kwargs):
+        paginator = paginator_class(queryset, 10, **kwargs)
+
+        return [list(paginator.page(number)) for number in paginator.page_range], paginator.count
+
+    def test_one_query_per_page(self):
+        with self.assertNumQueries(1):
+            page = WindowCountPaginator(User.objects.order_by("username"), 10).page(2)
+
+            self.assertEqual([user.username for user in page], ["user {:02}".format(i) for i in range(10, 20)])
+            self.assertEqual(page.paginator.count, 25)
+            self.assertEqual(page.paginator.num_pages, 3)
+            self.assertTrue(page.has_next())
+
+    def test_distinct_matches_paginator(self):
+        queryset = User.objects.filter(groups__name__startswith="group").distinct().order_by("-username")
+
+        self.assertEqual(
+            self.get_pages(WindowCountPaginator, queryset), self.get_pages(Paginator, queryset)
+        )
+        self.assertEqual(WindowCountPaginator(queryset, 10).count, 25)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(WindowCountPaginator(queryset, 10).page(3)), 5)
+
+    def test_orphans_on_last_page(self):
+        queryset = User.objects.order_by("username")
+
+        with self.assertNumQueries(1):
+            page = WindowCountPaginator(queryset, 10, orphans=5).page(2)
+
+            self.assertEqual(len(page), 15)
+            self.assertFalse(page.has_next())
+
+        self.assertEqual(
+            self.get_pages(WindowCountPaginator, queryset, orphans=5), self.get_pages(Paginator, queryset, orphans=5)
+        )
+
+        with self.assertRaises(EmptyPage):
+            WindowCountPaginator(queryset, 10, orphans=5).page(3)
+
+    def test_page_past_the_end_counts(self):
+        paginator = WindowCountPaginator(User.objects.order_by("username"), 10)
+
+        with self.assertNumQueries(2):
+            with self.assertRaises(EmptyPage):
+                paginator.page(4)
+
+        self.assertEqual(paginator.count, 25)
+
+    def test_empty_first_page(self):
+        with self.assertNumQueries(2):
+            page = WindowCountPaginator(User.objects.filter(username="nobody"), 10).page(1)
+
+            self.assertEqual(list(page), [])
+            self.assertEqual(page.paginator.count, 0)
+
+    def test_get_page(self):
+        paginator = WindowCountPaginator(User.objects.order_by("username"), 10)
+
+        self.assertEqual(paginator.get_page("abc").number, 1)
+        self.assertEqual(paginator.get_page(None).number, 1)
+        self.assertEqual(paginator.get_page(99).number, 3)
+        self.assertEqual(paginator.get_page(0).number, 3)
+        self.assertEqual(len(paginator.get_page(99)), 5)
+
+    def test_annotated_distinct_falls_back(self):
+        queryset = User.objects.filter(groups__name__startswith="group").annotate(
+            group_count=Count("groups")
+        ).distinct().order_by("username")
+        paginator = WindowCountPaginator(queryset, 10)
+
+        self.assertFalse(paginator.can_use_window_count())
+
+        with self.assertNumQueries(2):
+            page = paginator.page(1)
+
+            self.assertEqual(page[0].group_count, 1)
+            self.assertEqual(page[1].group_count, 2)
+
+    def test_extra_distinct_falls_back(self):
+        queryset = User.objects.filter(groups__name__startswith="group").extra(
+            select={"upper_username": "UPPER(username)"}
+        ).distinct().order_by("username")
+        paginator = WindowCountPaginator(queryset, 10)
+
+        self.assertFalse(paginator.can_use_window_count())
+        self.assertEqual(paginator.page(1)[0].upper_username, "USER 00")
+        self.assertEqual(paginator.count, 25)
+
+    def test_list_falls_back(self):
+        paginator = WindowCountPaginator(list(range(25)), 10)
+
+        self.assertFalse(paginator.can_use_window_count())
+        self.assertEqual(list(paginator.get_page(3)), list(range(20, 25)))
+
+
+queued_prefetches = []
+
+
+def queue_prefetch(task_path, args):
+    queued_prefetches.append((task_path, args))
+
+
+def fail_to_queue_prefetch(task_path, args):
+    raise IOError("The queue is down")
+
+
+class PrefetchUserBrowseView(BaseBrowseView):
+    model = User
+    sorts = ["username"]
+    default_pagination = 2
+    use_prefetch = True
+
+
+PREFETCH_VIEW_PATH = "search_filter_sort.tests.PrefetchUserBrowseView"
+
+
+class SchedulePrefetchTestCase(SimpleTestCase):
+    def setUp(self):
+        prefetch.reset_prefetch_stats()
+        del queued_prefetches[:]
+
+        for name, value in [("_executor", mock.Mock()), ("_pending_jobs", 0), ("_pending_keys", set()),
+                            ("_backend_pending_keys", {}), ("SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING", 2)]:
+            patcher = mock.patch.object(prefetch, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def schedule(self, key):
+        prefetch.schedule_prefetch("tasks.warm", [key], key)
+
+    def get_stats(self):
+        stats = prefetch.get_prefetch_stats()
+
+        return stats["scheduled"], stats["deduplicated"], stats["dropped"]
+
+    def test_pending_keys_are_deduplicated(self):
+        self.schedule("a")
+        self.schedule("a")
+
+        self.assertEqual(self.get_stats(), (1, 1, 0))
+        prefetch._executor.submit.assert_called_once_with(prefetch._run_prefetch_job, "tasks.warm", ["a"], "a")
+
+    def test_jobs_past_the_cap_are_dropped(self):
+        for key in ["a", "b", "c"]:
+            self.schedule(key)
+
+        self.assertEqual(self.get_stats(), (2, 0, 1))
+        self.assertEqual(prefetch._executor.submit.call_count, 2)
+
+    def test_finished_jobs_free_their_slot_and_key(self):
+        self.schedule("a")
+        self.schedule("b")
+
+        with mock.patch.object(prefetch, "run_prefetch_task") as run_prefetch_task, \
+                mock.patch.object(prefetch, "connections"):
+            prefetch._run_prefetch_job("tasks.warm", ["a"], "a")
+
+        run_prefetch_task.assert_called_once_with("tasks.warm", ["a"])
+        self.assertEqual(prefetch._pending_jobs, 1)
+
+        self.schedule("a")
+
+        self.assertEqual(self.get_stats(), (3, 0, 0))
+
+    def test_backend_queues_each_key_once_until_it_expires(self):
+        with mock.patch.object(prefetch, "SEARCH_FILTER_SORT_PREFETCH_BACKEND", "search_filter_sort.tests.queue_prefetch"):
+            self.schedule("a")
+            self.schedule("a")
+            prefetch._backend_pending_keys["a"] = 0
+            self.schedule("a")
+
+        self.assertEqual(queued_prefetches, [("tasks.warm", ["a"]), ("tasks.warm", ["a"])])
+        self.assertEqual(self.get_stats(), (2, 1, 0))
+        prefetch._executor.submit.assert_not_called()
+
+    def test_backend_failures_are_dropped(self):
+        backend_path = "search_filter_sort.tests.fail_to_queue_prefetch"
+
+        with mock.patch.object(prefetch, "SEARCH_FILTER_SORT_PREFETCH_BACKEND", backend_path), \
+                self.assertLogs(prefetch.logger, "ERROR"):
+            self.schedule("a")
+
+        self.assertEqual(self.get_stats(), (0, 0, 1))
+        self.assertEqual(prefetch._backend_pending_keys, {})
+
+
+class BrowsePrefetchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        prefetch.reset_prefetch_stats()
+
+        for username in ["ann", "bob", "cid", "dee", "eve"]:
+            User.objects.create(username=username)
+
+    def get(self, page=None, **kwargs):
+        parameters = {"page": page} if page is not None else {}
+
+        return PrefetchUserBrowseView.as_view()(RequestFactory().get("/users/", parameters), **kwargs)
+
+    def warm(self, page_number):
+        cache_key = prefetch.get_prefetch_cache_key(PREFETCH_VIEW_PATH, "/users/", [], page_number)
+        prefetch.warm_browse_page(PREFETCH_VIEW_PATH, "/users/", [], page_number, cache_key, "default", 60)
+
+        return cache_key
+
+    def get_page(self, response):
+        page_obj = response.context_data["page_obj"]
+
+        return [user.username for user in page_obj], page_obj.paginator.count
+
+    def get_stats(self):
+        stats = prefetch.get_prefetch_stats()
+
+        return stats["hits"], stats["misses"]
+
+    def test_next_page_is_scheduled_after_the_response(self):
+        with mock.patch("search_filter_sort.views.class_based.BaseBrowseView.schedule_prefetch") as schedule_prefetch:
+            response = self.get()
+
+            schedule_prefetch.assert_not_called()
+            response.close()
+
+        cache_key = prefetch.get_prefetch_cache_key(PREFETCH_VIEW_PATH, "/users/", [], 2)
+        schedule_prefetch.assert_called_once_with(
+            prefetch.WARM_BROWSE_PAGE_TASK,
+            [PREFETCH_VIEW_PATH, "/users/", [], 2, cache_key, "default", PrefetchUserBrowseView.prefetch_timeout],
+            cache_key
+        )
+
+    def test_cached_pages_are_not_scheduled_again(self):
+        self.warm(2)
+
+        with mock.patch("search_filter_sort.views.class_based.BaseBrowseView.schedule_prefetch") as schedule_prefetch:
+            self.get().close()
+
+        schedule_prefetch.assert_not_called()
+
+    def test_scheduling_errors_are_logged(self):
+        with mock.patch(
+            "search_filter_sort.views.class_based.BaseBrowseView.schedule_prefetch", side_effect=IOError
+        ), self.assertLogs("search_filter_sort.views.class_based.BaseBrowseView", "ERROR"):
+            self.get().close()
+
+    def test_views_with_url_arguments_are_refused(self):
+        with self.assertRaises(Exception):
+            self.get(pk=1)
+
+    def test_prefetched_page_is_used(self):
+        self.warm(2)
+
+        self.assertEqual(self.get_page(self.get(page=2)), (["cid", "dee"], 5))
+        self.assertEqual(self.get_stats(), (1, 0))
+
+    def test_pages_that_were_not_prefetched_miss(self):
+        self.warm(2)
+
+        self.assertEqual(self.get_page(self.get(page=3)), (["eve"], 5))
+        self.assertEqual(self.get_stats(), (0, 1))
+
+    def test_stale_prefetched_page_misses(self):
+        self.warm(2)
+        User.objects.filter(username="cid").delete()
+
+        self.assertEqual(self.get_page(self.get(page=2)), (["dee", "eve"], 4))
+        self.assertEqual(self.get_stats(), (0, 1))
+
+    def test_warming_fails_for_views_that_read_the_user(self):
+        class UserDependentBrowseView(PrefetchUserBrowseView):
+            def get_queryset(self):
+                return super(UserDependentBrowseView, self).get_queryset().exclude(pk=self.request.user.pk)
+
+        with mock.patch("search_filter_sort.tests.PrefetchUserBrowseView", UserDependentBrowseView), \
+                self.assertLogs(prefetch.logger, "ERROR"):
+            cache_key = self.warm(1)
+
+        self.assertIsNone(cache.get(cache_key))
+        self.assertEqual(prefetch.get_prefetch_stats()["errors"], 1)
@@ -0,0 +1,653 @@
+import datetime
+import math
+import operator
+import logging
+import re
+import uuid
+import pytz
+
+from functools import reduce
+from importlib import util
+
+from decimal import Decimal
+
+from dateutil import parser
+from dateutil.tz import tz
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import DecimalField, EmailField, F, FloatField, IntegerField, Lookup, Q, UUIDField
+from django.db.models.expressions import OrderBy
+from django.utils.functional import cached_property
+from django.utils.timezone import now
+
+PSYCOPG_FOUND = util.find_spec("psycopg") is not None
+
+if PSYCOPG_FOUND:
+    from psycopg.types.range import TimestamptzRange, NumericRange
+
+from search_filter_sort.utils.constants import RangeFilterTypes, PostgresRangeQueryFilterTypes, RouterHints, SearchStrategies, \
+    SearchTermTypes
+from search_filter_sort.utils.misc import class_strings_to_class, convert_age_to_date
+from search_filter_sort.utils.postgres_ranges import MULTIRANGE_QUERY_FILTER_TYPES, create_multirange_lookup
+
+logger = logging.getLogger(__name__)
+USER_SEARCH_LIST_DEFAULT = ["username", "first_name", "last_name", "email"]
+
+if hasattr(settings, "USER_SEARCH_LIST"):
+    USER_SEARCH_LIST = settings.USER_SEARCH_LIST
+else:
+    USER_SEARCH_LIST = USER_SEARCH_LIST_DEFAULT
+
+NUMERIC_REGEX = re.compile(r"^-?\d+(\.\d+)?$")
+INTEGER_REGEX = re.compile(r"^-?\d+$")
+EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+SEARCH_STRATEGY_LOOKUPS = {
+    SearchStrategies.EXACT: "exact",
+    SearchStrategies.IEXACT: "iexact",
+    SearchStrategies.PREFIX: "startswith",
+    SearchStrategies.NUMERIC: "exact",
+    SearchStrategies.ICONTAINS: "icontains"
+}
+SEARCH_STRATEGY_DEFAULT_TERM_TYPES = {
+    SearchStrategies.EXACT: [SearchTermTypes.TEXT],
+    SearchStrategies.IEXACT: [SearchTermTypes.TEXT],
+    SearchStrategies.PREFIX: [SearchTermTypes.TEXT],
+    SearchStrategies.NUMERIC: [SearchTermTypes.NUMERIC],
+    SearchStrategies.ICONTAINS: [SearchTermTypes.TEXT]
+}
+# Strategies that compare the whole term with the field, so the term has to be a valid value for the field
+TYPED_SEARCH_STRATEGIES = [SearchStrategies.EXACT, SearchStrategies.IEXACT, SearchStrategies.NUMERIC]
+# Term types used for typed strategies when the search list doesn't give any. The first matching field class wins.
+FIELD_CLASS_TERM_TYPES = [
+    (IntegerField, [SearchTermTypes.INTEGER]),
+    (DecimalField, [SearchTermTypes.NUMERIC]),
+    (FloatField, [SearchTermTypes.NUMERIC]),
+    (UUIDField, [SearchTermTypes.UUID]),
+    (EmailField, [SearchTermTypes.EMAIL])
+]
+# Nothing past 64 bit integers can be sent to any of the databases
+INTEGER_SEARCH_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def to_sort_expression(sort):
+    if isinstance(sort, OrderBy):
+        return sort
+
+    if isinstance(sort, str):
+        if sort.startswith("-"):
+            return F(sort[1:]).desc()
+
+        return F(sort).asc()
+
+    return sort.asc()
+
+
+def reverse_sort_expression(expression):
+    # Unlike OrderBy.reverse_ordering(), NULLS FIRST/LAST are kept where they were declared
+    expression = expression.copy()
+    expression.descending = not expression.descending
+
+    return expression
+
+
+def compile_sort_registry(sorts, sort_registry=None):
+    # Maps each sort key to the list of ascending OrderBy expressions used for it. sort_registry entries can be field
+    # names ("-" for descending), F() or other expressions, or OrderBy expressions such as F("x").asc(nulls_last=True).
+    # Plain keys in sorts keep the historical last_name/first_name and birthday behaviour.
+    compiled_sort_registry = {}
+
+    for sort in sorts:
+        if "last_name" in sort:
+            compiled_sort_registry[sort] = [to_sort_expression(sort.replace("last_name", "first_name")), to_sort_expression(sort)]
+        elif sort == "birthday":  # Ascending age is descending birthday
+            compiled_sort_registry[sort] = [to_sort_expression("-birthday")]
+        else:
+            compiled_sort_registry[sort] = [to_sort_expression(sort)]
+
+    for sort, expressions in (sort_registry or {}).items():
+        if not isinstance(expressions, (list, tuple)):
+            expressions = [expressions]
+
+        compiled_sort_registry[sort] = [to_sort_expression(expression) for expression in expressions]
+
+    return compiled_sort_registry
+
+
+def get_parameter(parameters, key, default=None):
+    # parameters can be a QueryDict or any plain mapping of key to value (or list of values)
+    value = parameters.get(key, default)
+
+    if isinstance(value, (list, tuple)):
+        return value[-1] if value else default
+
+    return value
+
+
+def get_parameter_list(parameters, key, default=None):
+    if hasattr(parameters, "getlist"):
+        values = parameters.getlist(key)
+    else:
+        values = parameters.get(key, [])
+
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+
+    if not values:
+        return default
+
+    return list(values)
+
+
+def prefix_search_item(prefix, search_item):
+    if isinstance(search_item, (list, tuple)):
+        return (str(prefix + "__{0}").format(search_item[0]),) + tuple(search_item[1:])
+
+    return str(prefix + "__{0}").format(search_item)
+
+
+def normalize_search_item(search_item, model_field=None):
+    # Search list entries are either a field name (searched with icontains) or a tuple of
+    # (field name, SearchStrategies.X) or (field name, SearchStrategies.X, [SearchTermTypes.Y, ...]). The term types
+    # limit the field to terms of those types, e.g. ("email", SearchStrategies.IEXACT, [SearchTermTypes.EMAIL]). Without
+    # them, typed strategies on integer, decimal, float, UUID and email fields only take terms of the field's type.
+    if not isinstance(search_item, (list, tuple)):
+        return search_item, SearchStrategies.ICONTAINS, SEARCH_STRATEGY_DEFAULT_TERM_TYPES[SearchStrategies.ICONTAINS]
+
+    field = search_item[0]
+    strategy = search_item[1] if len(search_item) > 1 else SearchStrategies.ICONTAINS
+
+    if len(search_item) > 2:
+        term_types = search_item[2]
+    else:
+        term_types = get_default_term_types(strategy, model_field)
+
+    return field, strategy, term_types
+
+
+def get_default_term_types(strategy, model_field):
+    if model_field is not None and strategy in TYPED_SEARCH_STRATEGIES:
+        for field_class, term_types in FIELD_CLASS_TERM_TYPES:
+            if isinstance(model_field, field_class):
+                return term_types
+
+    return SEARCH_STRATEGY_DEFAULT_TERM_TYPES[strategy]
+
+
+def get_search_model_field(model, field_path):
+    # Follows the relations in a search field (e.g. "user__email") to the model field it ends on. None when it doesn't
+    # end on a model field (annotations, transforms, ...).
+    model_field = None
+
+    for field_name in field_path.split("__"):
+        if model_field is not None:
+            if model_field.related_model is None:
+                return None
+
+            model = model_field.related_model
+
+        try:
+            model_field = model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+
+    # Forward relations are searched by the value of the field they point at
+    if model_field is not None and model_field.is_relation and not model_field.auto_created:
+        model_field = model_field.target_field
+
+    return model_field
+
+
+def classify_search_term(term):
+    # Every term can be free text. It can also be one (or more) of the more specific types.
+    term_types = {SearchTermTypes.TEXT}
+
+    if NUMERIC_REGEX.match(term):
+        term_types.add(SearchTermTypes.NUMERIC)
+
+    if INTEGER_REGEX.match(term):
+        term_types.add(SearchTermTypes.INTEGER)
+
+    if EMAIL_REGEX.match(term):
+        term_types.add(SearchTermTypes.EMAIL)
+
+    try:
+        uuid.UUID(term)
+        term_types.add(SearchTermTypes.UUID)
+    except ValueError:
+        pass
+
+    return term_types
+
+
+def search_fields(class_object, list_of_used_classes):
+    object_search_list = []
+
+    if class_object in list_of_used_classes:
+        return []
+    else:
+        list_of_used_classes.append(class_object)
+
+    if class_object.__name__ == "User":
+        search_list = [search_item for search_item in USER_SEARCH_LIST]
+    else:
+        object_dependencies = class_object.object_dependencies()
+
+        for object_dependency in object_dependencies:
+            if object_dependency[2] == "User":
+                object_search_list += [
+                    prefix_search_item(object_dependency[0], search_item) for search_item in USER_SEARCH_LIST
+                ]
+            else:
+                other_class_object = class_strings_to_class(object_dependency[1], object_dependency[2])
+                other_object_search_list = search_fields(other_class_object, list_of_used_classes)
+                object_search_list += [
+                    prefix_search_item(object_dependency[0], search_item) for search_item in other_object_search_list
+                ]
+
+        search_list = class_object.basic_search_list() + class_object.special_search_list() + object_search_list
+
+    return search_list
+
+
+class BrowseResult(object):
+    def __init__(self, queryset, base_queryset, search_by="", using_filters=False):
+        self.queryset = queryset
+        self.base_queryset = base_queryset
+        self.search_by = search_by
+        self.using_filters = using_filters
+
+    # The counts are only run when asked for, so callers that get them some other way (e.g. from a paginator) don't
+    # pay for them twice
+    @cached_property
+    def filtered_object_count(self):
+        return self.queryset.count()
+
+    @cached_property
+    def total_object_count(self):
+        return self.base_queryset.count()
+
+
+class BrowseQuery(object):
+    # The search, filter and sort pipeline behind BaseBrowseView. It only needs a mapping of the usual browse
+    # parameters (search_by, filter_name, filter_value, sort_by), so it can also be used from function based views,
+    # APIs, tasks and management commands. A single instance can be run against any number of parameter sets.
+    def __init__(self, model, sorts=None, default_sort_by=None, deferments=None, searches=None, using_postgres=False,
+                 postgres_filter_name_query_filter_type_map=None, queryset=None, using=None, sort_registry=None,
+                 compiled_sort_registry=None, use_multirange_filters=True):
+        self.model = model
+        self.sorts = sorts if sorts is not None else []
+
+        if compiled_sort_registry is None:
+            compiled_sort_registry = compile_sort_registry(self.sorts, sort_registry)
+
+        self.compiled_sort_registry = compiled_sort_registry
+        self.default_sort_by = default_sort_by if default_sort_by is not None else ["-id"]
+        self.deferments = deferments if deferments is not None else []
+        self.searches = searches if searches is not None else search_fields(model, [])
+        self.using_postgres = using_postgres
+        self.use_multirange_filters = use_multirange_filters
+        self.postgres_filter_name_query_filter_type_map = postgres_filter_name_query_filter_type_map or {}
+
+        if queryset is None:
+            queryset = model.objects.db_manager(using, hints={RouterHints.BROWSE: True}).all()
+
+        self.queryset = queryset
+
+    def run(self, parameters):
+        if get_parameter(parameters, "__RETURN_EMPTY__"):
+            return BrowseResult(self.queryset.none(), self.queryset)
+
+        search_bys = get_parameter(parameters, "search_by")
+        filter_names = get_parameter_list(parameters, "filter_name", [])
+        filter_values = get_parameter_list(parameters, "filter_value", [])
+        sort_bys = get_parameter_list(parameters, "sort_by", self.default_sort_by)
+
+        if not sort_bys:
+            raise ValueError("The default sort by is not in the view's sorts list")
+
+        search_list = self.get_search_list(search_bys)
+        filter_list = self.get_filter_list(filter_names, filter_values)
+        sort_list = self.get_sort_list(sort_bys)
+
+        # Search, filter, sort
+        if search_list:
+            list_of_search_bys_Q = [Q(**{key: value}) for key, value in search_list.items()]
+            search_reduce = reduce(operator.or_, list_of_search_bys_Q)
+        elif search_bys and self.searches:  # None of the search fields can match this term
+            return BrowseResult(self.queryset.none(), self.queryset, search_bys, bool(filter_list))
+        else:
+            search_reduce = None
+
+        if filter_list:
+            list_of_filter_bys_Q = [[self.get_filter_Q(key, value) for value in array] for key, array in filter_list.items()]
+            reduced_filters = []
+
+            for array in list_of_filter_bys_Q:
+                reduced_filters.append(reduce(operator.or_, array))
+
+            filter_reduce = reduce(operator.and_, reduced_filters)
+            using_filters = True
+        else:
+            filter_reduce = None
+            using_filters = False
+
+        if search_reduce and filter_reduce:
+            queryset = self.queryset.filter(search_reduce).filter(filter_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
+        elif search_reduce:
+            queryset = self.queryset.filter(search_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
+        elif filter_reduce:
+            queryset = self.queryset.filter(filter_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
+        else:
+            queryset = self.queryset.defer(*self.deferments).order_by(*sort_list)
+            # queryset = sorted(self.model.objects.all(), key=lambda x: [int(t) if t.isdigit() else t.lower() for t in re.split('(\d+)', x.name)])
+
+        # TODO: Find a way to natural sort the queryset
+        # SELECT * FROM job
+        # ORDER BY(substring('name', '^[0-9]+'))::int -- cast to integer\
+        #     , coalesce(substring('name', '[^0-9_].*$'), '')
+
+        return BrowseResult(queryset, self.queryset, search_bys or "", using_filters)
+
+    def run_many(self, list_of_parameters):
+        return [self.run(parameters) for parameters in list_of_parameters]
+
+    def get_filter_Q(self, filter_name, value):
+        # Lookups (such as multirange lookups) already know their field and are used as they are
+        if isinstance(value, Lookup):
+            return Q(value)
+
+        return Q(**{filter_name: value})
+
+    def get_search_list(self, search_bys):
+        # Determine search_list
+        search_list = {}
+
+        if search_bys:
+            # Classify the term once, then skip the fields it can't match and use the cheapest lookup for the rest
+            term = search_bys.strip()
+            term_types = classify_search_term(term)
+
+            for search_item in self.searches:
+                field = search_item[0] if isinstance(search_item, (list, tuple)) else search_item
+                model_field = get_search_model_field(self.model, field)
+                field, strategy, accepted_term_types = normalize_search_item(search_item, model_field)
+
+                if not term_types.intersection(accepted_term_types):
+                    continue
+
+                if strategy == SearchStrategies.ICONTAINS:
+                    value = search_bys
+                elif strategy in TYPED_SEARCH_STRATEGIES:
+                    value = self.get_typed_search_value(term, strategy, model_field)
+
+                    if value is None:  # The field can't hold this term
+                        continue
+                else:
+                    value = term
+
+                search_list[field + "__" + SEARCH_STRATEGY_LOOKUPS[strategy]] = value
+
+        return search_list
+
+    def get_typed_search_value(self, term, strategy, model_field):
+        # The term converted the way the field would convert it, or None if the field can't hold it. Sending such a
+        # value to the database would either match the wrong rows (1.5 truncated to 1) or fail (overflowing integers).
+        if model_field is None:
+            if strategy != SearchStrategies.NUMERIC:
+                return term
+
+            value = int(term) if INTEGER_REGEX.match(term) else Decimal(term)
+        else:
+            try:
+                value = model_field.to_python(term)
+            except (ValidationError, ValueError, TypeError):
+                return None
+
+        if isinstance(value, float) and not math.isfinite(value):
+            return None
+
+        if isinstance(value, int) and not isinstance(value, bool):
+            minimum, maximum = self.get_integer_search_range(model_field)
+
+            if not minimum <= value <= maximum:
+                return None
+
+        return value
+
+    def get_integer_search_range(self, model_field):
+        minimum, maximum = INTEGER_SEARCH_RANGE
+
+        if model_field is None:
+            return minimum, maximum
+
+        try:
+            field_minimum, field_maximum = connections[self.queryset.db].ops.integer_field_range(model_field.get_internal_type())
+        except KeyError:  # Not one of the integer fields
+            return minimum, maximum
+
+        if field_minimum is not None:
+            minimum = max(minimum, field_minimum)
+
+        if field_maximum is not None:
+            maximum = min(maximum, field_maximum)
+
+        return minimum, maximum
+
+    def get_filter_list(self, filter_names, filter_values):
+        # Determine filter_list
+        filter_list = {}
+
+        postgres_range_filter_dictionaries = {}
+        datetime_range_filter_dictionaries = {}
+
+        for i in range(len(filter_names)):
+            filter_name = filter_names[i]
+
+            # This is only false if there are more filter_names than filter_values. Should be equal.
+            if i < len(filter_values):
+                values = filter_values[i].split(",")
+                split_regex = re.compile("__lte|__lt|__gte|__gt")
+                split_filter_name = split_regex.split(filter_name)
+                filter_type = next(iter(split_regex.findall(filter_name)), None)
+                stripped_filter_name = split_filter_name[0]
+                stripped_filter_info = None
+
+                if len(split_filter_name) != 1:
+                    stripped_filter_info = split_filter_name[1].replace("_", "", 1)
+
+                if stripped_filter_info:
+                    if RangeFilterTypes.DATETIME in stripped_filter_info:
+                        dates_or_times = stripped_filter_info.split("_")[1] + "s"
+                        new_filter_name = stripped_filter_name + filter_type
+
+                        if not datetime_range_filter_dictionaries.get(new_filter_name, None):
+                            datetime_range_filter_dictionaries[new_filter_name] = {
+                                "times": [],
+                                "dates": [],
+                                "filter_type": filter_type
+                            }
+
+                        datetime_range_filter_dictionaries[new_filter_name][dates_or_times] = self.convert_values(values, stripped_filter_info.split("_")[1])
+                        continue
+
+                    if self.using_postgres:
+                        self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, stripped_filter_name, filter_type, stripped_filter_info, values)
+                    else:
+                        if stripped_filter_info == RangeFilterTypes.AGE:
+                            values = [convert_age_to_date(int(filter_values[i]))]
+
+                        if filter_type:
+                            filter_name = stripped_filter_name + filter_type
+
+                        filter_list[filter_name] = self.convert_values(values, stripped_filter_info)
+                else:
+                    if filter_type:
+                        filter_name = stripped_filter_name + filter_type
+
+                    filter_list[filter_name] = self.convert_values(values, stripped_filter_info)
+            else:
+                break
+
+        for datetime_range_filter_name_and_type, datetime_range_filter_date_and_time_values in datetime_range_filter_dictionaries.items():
+            filter_name = "__".join(datetime_range_filter_name_and_type.split("__")[0:-1])
+            filter_type = datetime_range_filter_date_and_time_values["filter_type"]
+            datetime_values = []
+            dates = datetime_range_filter_date_and_time_values["dates"]
+            times = datetime_range_filter_date_and_time_values["times"]
+
+            if not dates:
+                self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, filter_name, filter_type, RangeFilterTypes.DATETIME, [])
+                continue
+            if not times:
+                times = [date for date in dates]
+
+            date_time_pairs = zip(dates, times)
+
+            for date_time_pair in date_time_pairs:
+                datetime_values.append(str(tz.resolve_imaginary(datetime.datetime.combine(date_time_pair[0].date(), date_time_pair[1].time())).replace(tzinfo=date_time_pair[0].tzinfo)))
+
+            if self.using_postgres:
+                self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, filter_name, filter_type, RangeFilterTypes.DATETIME, datetime_values)
+            else:
+                filter_list[filter_name] = self.convert_values(datetime_values, RangeFilterTypes.DATETIME)
+
+        for postgres_range_filter_name, postgres_range_filter_dictionary in postgres_range_filter_dictionaries.items():
+            postgres_query_filter_type = self.postgres_filter_name_query_filter_type_map.get(postgres_range_filter_name, PostgresRangeQueryFilterTypes.CONTAINED_BY)
+            query_filter_name = postgres_range_filter_name + postgres_query_filter_type
+            lowers = postgres_range_filter_dictionary["lowers"]
+            uppers = postgres_range_filter_dictionary["uppers"]
+            range_type = postgres_range_filter_dictionary["range_type"]
+            lower_bound = postgres_range_filter_dictionary.get("lower_bound", "[")
+            upper_bound = postgres_range_filter_dictionary.get("upper_bound", "]")
+
+            if not lower_bound:
+                lower_bound = "["
+
+            if not upper_bound:
+                upper_bound = "]"
+
+            bounds_string = lower_bound + upper_bound
+            range_objects = self.create_psycopg2_range_object_list(lowers, uppers, range_type, bounds_string)
+
+            # One multirange predicate instead of one OR-ed predicate per range, so a GiST index can be used
+            if self.use_multirange_filters and postgres_query_filter_type in MULTIRANGE_QUERY_FILTER_TYPES:
+                filter_list[query_filter_name] = [
+                    create_multirange_lookup(postgres_range_filter_name, postgres_query_filter_type, range_objects, range_type)
+                ]
+            else:
+                filter_list[query_filter_name] = range_objects
+
+        return filter_list
+
+    def get_sort_list(self, sort_bys):
+        # Determine sort_list
+        sort_list = []
+
+        for sort_by in sort_bys:
+            descending = sort_by.startswith("-")
+            base_sort = sort_by[1:] if descending else sort_by
+            expressions = self.compiled_sort_registry.get(base_sort, None)
+
+            if expressions is None:
+                logger.debug("Sort of " + base_sort + " is not in the sorts.")
+                continue
+
+            for expression in expressions:
+                if descending:
+                    expression = reverse_sort_expression(expression)
+
+                sort_list.append(expression)
+
+        # Always end with the primary key so the order is total and pages don't shuffle between requests. It goes in the
+        # same direction as the last sort so an index on (last sort, pk) can still be scanned in one direction.
+        pk_names = ["pk", self.model._meta.pk.name]
+
+        if not any(isinstance(expression.expression, F) and expression.expression.name in pk_names for expression in sort_list):
+            descending = sort_list[-1].descending if sort_list else False
+            sort_list.append(OrderBy(F(self.model._meta.pk.name), descending=descending))
+
+        return sort_list
+
+    def convert_values(self, values, range_type):
+        the_now = now()
+        if settings.TIME_ZONE:
+            timezone = pytz.timezone(settings.TIME_ZONE)
+            the_now = the_now.astimezone(timezone)
+
+        current_time_zone = the_now.strftime("%z")
+        new_values = []
+
+        for value in values:
+            if value == "__NONE_OR_BLANK__":
+                new_values.append("")
+                value = None
+            elif value == "__NONE__":
+                value = None
+            elif value == "__BLANK__":
+                value = ""
+            elif value == "__TRUE__":
+                value = True
+            elif value == "__FALSE__":
+                value = False
+            elif range_type == RangeFilterTypes.DATE:
+                value = parser.parse(value + " 00:00:00" + current_time_zone)
+            elif range_type == RangeFilterTypes.TIME:
+                value = parser.parse(value)
+            elif range_type in [RangeFilterTypes.NUMBER, RangeFilterTypes.AGE]:
+                try:
+                    value = int(value)
+                except ValueError:
+                    value = float(value)
+
+            new_values.append(value)
+
+        return new_values
+
+    def create_psycopg2_range_object_list(self, lower_bounds, upper_bounds, range_type, bounds_string):
+        bound_value_length = max(len(lower_bounds), len(upper_bounds))
+
+        if not lower_bounds:
+            lower_bounds = [None for i in range(0, bound_value_length)]
+
+        if not upper_bounds:
+            upper_bounds = [None for i in range(0, bound_value_length)]
+
+        lower_and_upper_pairs = zip(lower_bounds, upper_bounds)
+        if range_type in [RangeFilterTypes.DATETIME, RangeFilterTypes.DATE, RangeFilterTypes.TIME]:
+            TZ_RANGE_OBJECT = TimestamptzRange
+        elif range_type in [RangeFilterTypes.NUMBER, RangeFilterTypes.AGE]:
+            TZ_RANGE_OBJECT = NumericRange
+        else:
+            raise Exception("Range Type of " + range_type + "does not map to any current psycopg2 range object")
+
+        return [TZ_RANGE_OBJECT(lower_and_upper_pair[0], lower_and_upper_pair[1], bounds=bounds_string) for lower_and_upper_pair in lower_and_upper_pairs]
+
+    def create_or_edit_postgres_range_filter_dictionary(self, postgres_range_filter_dictionaries, filter_name, filter_type, range_type, values):
+        if not postgres_range_filter_dictionaries.get(filter_name, None):
+            postgres_range_filter_dictionaries[filter_name] = {
+                "lowers": [],
+                "uppers": [],
+                "range_type": range_type,
+                "lower_bound": None,
+                "upper_bound": None
+            }
+
+        if "g" in filter_type:
+            upper_or_lower_bound = "lower"
+            bound_character = "("
+
+            if "te" in filter_type:
+                bound_character = "["
+        elif "l" in filter_type:
+            upper_or_lower_bound = "upper"
+            bound_character = ")"
+
+            if "te" in filter_type:
+                bound_character = "]"
+        else:
+            raise Exception("Invalid bound of " + filter_type)
+
+        postgres_range_filter_dictionaries[filter_name][upper_or_lower_bound + "_bound"] = bound_character
+        postgres_range_filter_dictionaries[filter_name][upper_or_lower_bound + "s"] = self.convert_values(values, range_type)
@@ -15,3 +15,33 @@ class PostgresRangeQueryFilterTypes:
     NOT_GREATER_THAN = "__not_gt"
     FULLY_LESS_THAN = "__fully_lt"
     FULLY_GREATER_THAN = "__fully_gt"
+
+
+class SearchStrategies:
+    EXACT = "exact"
+    IEXACT = "iexact"
+    PREFIX = "prefix"
+    NUMERIC = "numeric"
+    ICONTAINS = "icontains"
+
+
+class SearchTermTypes:
+    TEXT = "text"
+    NUMERIC = "numeric"
+    INTEGER = "integer"
+    EMAIL = "email"
+    UUID = "uuid"
+
+
+class SessionKeys:
+    LAST_WRITE = "search_filter_sort_last_write"
+
+
+class RouterHints:
+    BROWSE = "search_filter_sort_browse"
+
+
+class LazyFilterParameters:
+    FILTER_NAME = "__FILTER_OPTIONS__"
+    SEARCH = "options_search"
+    PAGE = "options_page"
@@ -1,8 +1,11 @@
 import importlib
+import time
 import pytz
 
 from django.utils.timezone import datetime
 
+from search_filter_sort.utils.constants import SessionKeys
+
 
 def class_strings_to_class(module_path, class_name):
     try:
@@ -24,4 +27,12 @@ def convert_age_to_date(age):
     today = datetime.today()
     year = today.year - age
 
-    return datetime(year, today.month, today.day, tzinfo=pytz.utc)
\ No newline at end of file
+    return datetime(year, today.month, today.day, tzinfo=pytz.utc)
+
+
+def mark_recent_write(request):
+    # Call after a bulk action so the next browse requests read from the primary database instead of a lagging replica
+    session = getattr(request, "session", None)
+
+    if session is not None:
+        session[SessionKeys.LAST_WRITE] = time.time()
@@ -0,0 +1,80 @@
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Count, QuerySet, Window
+from django.utils.translation import gettext_lazy
+
+WINDOW_COUNT_ANNOTATION = "_search_filter_sort_total_count"
+
+
+class WindowCountPaginator(Paginator):
+    # Fetches a page together with the total count (COUNT(*) OVER ()) in a single query. A separate count query is only
+    # run when the requested page turns out to be past the end.
+    def validate_page_number(self, number):
+        # Same as validate_number, but without the upper bound check since that would need the count
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(gettext_lazy("That page number is not an integer"))
+
+        if number < 1:
+            raise EmptyPage(gettext_lazy("That page number is less than 1"))
+
+        return number
+
+    def can_use_window_count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return False
+
+        # DISTINCT querysets are rebuilt in get_window_count_queryset, which can't carry annotations or extra() over
+        query = self.object_list.query
+
+        return not (query.distinct and (query.annotations or query.extra))
+
+    def get_window_count_queryset(self):
+        queryset = self.object_list
+
+        # The window count would include the rows DISTINCT removes, so filter on the distinct primary keys instead
+        if queryset.query.distinct:
+            distinct_queryset = queryset.model._default_manager.db_manager(queryset.db).filter(
+                pk__in=queryset.order_by().values("pk")
+            ).order_by(*queryset.query.order_by)
+            distinct_queryset.query.deferred_loading = queryset.query.deferred_loading
+            distinct_queryset.query.select_related = queryset.query.select_related
+            distinct_queryset._prefetch_related_lookups = queryset._prefetch_related_lookups
+            queryset = distinct_queryset
+
+        return queryset.annotate(**{WINDOW_COUNT_ANNOTATION: Window(expression=Count("*"))})
+
+    def page(self, number):
+        # Lists, or a paginator whose count is already known, don't gain anything from the window count
+        if not self.can_use_window_count() or "count" in self.__dict__:
+            return super(WindowCountPaginator, self).page(number)
+
+        number = self.validate_page_number(number)
+        bottom = (number - 1) * self.per_page
+        # Fetch the orphans as well in case they end up on this page
+        rows = list(self.get_window_count_queryset()[bottom:bottom + self.per_page + self.orphans])
+
+        if not rows:
+            # Past the end (or nothing at all), so fall back to counting to know where the end is
+            return self._get_page([], self.validate_number(number), self)
+
+        self.__dict__["count"] = getattr(rows[0], WINDOW_COUNT_ANNOTATION)
+        number = self.validate_number(number)
+        top = bottom + self.per_page
+
+        if top + self.orphans >= self.count:
+            top = self.count
+
+        return self._get_page(rows[:top - bottom], number, self)
+
+    def get_page(self, number):
+        # Out of range pages give the last page instead of an error
+        try:
+            return self.page(number)
+        except PageNotAnInteger:
+            return self.page(1)
+        except EmptyPage:
+            return self.page(self.num_pages)
@@ -0,0 +1,169 @@
+from django.db.models import F, Lookup
+
+from search_filter_sort.utils.constants import PostgresRangeQueryFilterTypes, RangeFilterTypes
+
+# Only these comparisons can be made against the union of the ranges. For range columns, contained_by against the
+# union isn't the same as OR-ing the ranges ([2,8] is contained by [1,5] + [3,10] but by neither of them), so range
+# columns are still compared with one range at a time (see MultirangeLookup.merges_for_range_columns).
+MULTIRANGE_QUERY_FILTER_TYPES = [PostgresRangeQueryFilterTypes.CONTAINED_BY, PostgresRangeQueryFilterTypes.OVERLAP]
+MULTIRANGE_MINIMUM_POSTGRES_VERSION = 140000
+
+RANGE_DB_TYPES = ["tstzrange", "tsrange", "daterange", "int4range", "int8range", "numrange"]
+SCALAR_DB_TYPE_RANGE_TYPES = {
+    "timestamp with time zone": "tstzrange",
+    "timestamp": "tsrange",
+    "date": "daterange",
+    "smallint": "int4range",
+    "integer": "int4range",
+    "serial": "int4range",
+    "bigint": "int8range",
+    "bigserial": "int8range",
+    "numeric": "numrange",
+    "double precision": "numrange",
+    "real": "numrange"
+}
+NUMERIC_CAST_DB_TYPES = ["double precision", "real"]
+
+
+def merge_ranges(ranges):
+    # Merges overlapping and adjacent ranges so the database gets the smallest set of disjoint ranges
+    ranges = sorted(
+        [a_range for a_range in ranges if not range_is_empty(a_range)],
+        key=lambda a_range: (a_range.lower is not None, a_range.lower if a_range.lower is not None else 0, not a_range.lower_inc)
+    )
+    merged_ranges = []
+
+    for a_range in ranges:
+        if not merged_ranges or not ranges_touch(merged_ranges[-1], a_range):
+            merged_ranges.append(a_range)
+            continue
+
+        last_range = merged_ranges[-1]
+
+        if last_range.upper is None or a_range.upper is None:
+            upper, upper_inc = None, False
+        elif a_range.upper > last_range.upper:
+            upper, upper_inc = a_range.upper, a_range.upper_inc
+        elif a_range.upper == last_range.upper:
+            upper, upper_inc = last_range.upper, last_range.upper_inc or a_range.upper_inc
+        else:
+            upper, upper_inc = last_range.upper, last_range.upper_inc
+
+        bounds_string = ("[" if last_range.lower_inc else "(") + ("]" if upper_inc else ")")
+        merged_ranges[-1] = type(last_range)(last_range.lower, upper, bounds=bounds_string)
+
+    return merged_ranges
+
+
+def range_is_empty(a_range):
+    # psycopg only flags ranges created as empty. Postgres rejects a lower bound above the upper one.
+    if a_range.isempty:
+        return True
+
+    if a_range.lower is None or a_range.upper is None:
+        return False
+
+    return a_range.lower > a_range.upper or (a_range.lower == a_range.upper and not (a_range.lower_inc and a_range.upper_inc))
+
+
+def ranges_touch(lower_range, upper_range):
+    # lower_range must not start after upper_range
+    if lower_range.upper is None or upper_range.lower is None:
+        return True
+
+    if upper_range.lower < lower_range.upper:
+        return True
+
+    return upper_range.lower == lower_range.upper and (lower_range.upper_inc or upper_range.lower_inc)
+
+
+def range_to_literal(a_range):
+    return "{lower_bound}{lower},{upper}{upper_bound}".format(
+        lower_bound="[" if a_range.lower_inc else "(",
+        lower=quote_range_value(a_range.lower),
+        upper=quote_range_value(a_range.upper),
+        upper_bound="]" if a_range.upper_inc else ")"
+    )
+
+
+def quote_range_value(value):
+    if value is None:
+        return ""
+
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class MultirangeLookup(Lookup):
+    # Compares a field with the union of several ranges in one predicate: field <@ '{[a,b), [c,d)}'::tstzmultirange.
+    # On servers without multiranges (before PostgreSQL 14), and for comparisons that would change meaning, it falls
+    # back to one comparison per range. The rhs is the list of range objects.
+    # Not registered on any field, it is passed straight to filter() (see create_multirange_lookup).
+    prepare_rhs = False
+    operator = None
+    merges_for_range_columns = True
+
+    def __init__(self, lhs, rhs, default_range_type):
+        self.default_range_type = default_range_type
+        super(MultirangeLookup, self).__init__(lhs, rhs)
+
+    def get_range_type(self, connection):
+        db_type = (self.lhs.output_field.db_type(connection) or "").split("(")[0]
+
+        if db_type in RANGE_DB_TYPES:
+            return db_type
+
+        return SCALAR_DB_TYPE_RANGE_TYPES.get(db_type, self.default_range_type)
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        range_type = self.get_range_type(connection)
+        db_type = (self.lhs.output_field.db_type(connection) or "").split("(")[0]
+
+        if db_type in NUMERIC_CAST_DB_TYPES:
+            lhs_sql = "(%s)::numeric" % lhs_sql
+
+        if db_type in RANGE_DB_TYPES and not self.merges_for_range_columns:
+            range_literals = [range_to_literal(a_range) for a_range in self.rhs if not range_is_empty(a_range)]
+        else:
+            range_literals = [range_to_literal(a_range) for a_range in merge_ranges(self.rhs)]
+
+            if getattr(connection, "pg_version", 0) >= MULTIRANGE_MINIMUM_POSTGRES_VERSION:
+                multirange_type = range_type.replace("range", "multirange")
+                sql = "%s %s %%s::%s" % (lhs_sql, self.operator, multirange_type)
+
+                return sql, list(lhs_params) + ["{" + ",".join(range_literals) + "}"]
+
+        if not range_literals:
+            return "FALSE", []
+
+        sql = " OR ".join(["%s %s %%s::%s" % (lhs_sql, self.operator, range_type)] * len(range_literals))
+        params = []
+
+        for range_literal in range_literals:
+            params += list(lhs_params) + [range_literal]
+
+        return "(%s)" % sql, params
+
+
+class MultirangeContainedBy(MultirangeLookup):
+    operator = "<@"
+    merges_for_range_columns = False
+
+
+class MultirangeOverlap(MultirangeLookup):
+    operator = "&&"
+
+
+MULTIRANGE_LOOKUP_CLASSES = {
+    PostgresRangeQueryFilterTypes.CONTAINED_BY: MultirangeContainedBy,
+    PostgresRangeQueryFilterTypes.OVERLAP: MultirangeOverlap
+}
+
+
+def create_multirange_lookup(filter_name, postgres_query_filter_type, range_objects, range_type):
+    if range_type in [RangeFilterTypes.DATETIME, RangeFilterTypes.DATE, RangeFilterTypes.TIME]:
+        default_range_type = "tstzrange"
+    else:
+        default_range_type = "numrange"
+
+    return MULTIRANGE_LOOKUP_CLASSES[postgres_query_filter_type](F(filter_name), tuple(range_objects), default_range_type)
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+
+from search_filter_sort.utils.misc import class_strings_to_class
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_CACHE_KEY_PREFIX = "search_filter_sort_prefetch"
+WARM_BROWSE_PAGE_TASK = "search_filter_sort.utils.prefetch.warm_browse_page"
+MAX_TRACKED_QUERIES = 1000
+
+if hasattr(settings, "SEARCH_FILTER_SORT_PREFETCH_WORKERS"):
+    SEARCH_FILTER_SORT_PREFETCH_WORKERS = settings.SEARCH_FILTER_SORT_PREFETCH_WORKERS
+else:
+    SEARCH_FILTER_SORT_PREFETCH_WORKERS = 2
+
+if hasattr(settings, "SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING"):
+    SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING = settings.SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING
+else:
+    SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING = 20
+
+# Dotted path of a callable taking (task_path, args) that queues the task somewhere else, e.g. a Celery task that calls
+# run_prefetch_task(task_path, args). task_path is a dotted path and args is a JSON serializable list, so both can go
+# through any task queue. The default runs the task on a bounded thread pool in this process.
+if hasattr(settings, "SEARCH_FILTER_SORT_PREFETCH_BACKEND"):
+    SEARCH_FILTER_SORT_PREFETCH_BACKEND = settings.SEARCH_FILTER_SORT_PREFETCH_BACKEND
+else:
+    SEARCH_FILTER_SORT_PREFETCH_BACKEND = None
+
+# How long a prefetch handed to the backend counts as in flight, since there is no way of knowing when it is done
+if hasattr(settings, "SEARCH_FILTER_SORT_PREFETCH_BACKEND_PENDING_SECONDS"):
+    SEARCH_FILTER_SORT_PREFETCH_BACKEND_PENDING_SECONDS = settings.SEARCH_FILTER_SORT_PREFETCH_BACKEND_PENDING_SECONDS
+else:
+    SEARCH_FILTER_SORT_PREFETCH_BACKEND_PENDING_SECONDS = 30
+
+_executor = None
+_pending_jobs = 0
+_pending_keys = set()
+_backend_pending_keys = {}
+_lock = threading.Lock()
+_stats = Counter()
+_query_frequencies = {}
+
+
+def record_prefetch_stat(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def get_prefetch_stats():
+    with _lock:
+        stats = {
+            name: _stats[name] for name in ["hits", "misses", "scheduled", "deduplicated", "dropped", "warmed", "errors"]
+        }
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / float(lookups) if lookups else 0.0
+
+    return stats
+
+
+def reset_prefetch_stats():
+    with _lock:
+        _stats.clear()
+        _query_frequencies.clear()
+
+
+def get_canonical_parameters(parameters):
+    # The page doesn't change which query is being run. The order of the values is kept since it matters for
+    # sort_by and for matching filter_names with filter_values.
+    return [[key, parameters.getlist(key)] for key in sorted(parameters.keys()) if key != "page"]
+
+
+def get_prefetch_cache_key(view_path, request_path, canonical_parameters, page_number):
+    # paginate_by is one of the parameters, so the page size is part of the key too
+    key_data = json.dumps([view_path, request_path, canonical_parameters, page_number])
+
+    return PREFETCH_CACHE_KEY_PREFIX + ":" + hashlib.md5(key_data.encode("utf-8")).hexdigest()
+
+
+def record_query(view_path, request_path, canonical_parameters):
+    query_key = json.dumps([request_path, canonical_parameters])
+
+    with _lock:
+        frequencies = _query_frequencies.setdefault(view_path, Counter())
+        frequencies[query_key] += 1
+
+        # Keep the bookkeeping bounded by forgetting the rarest queries
+        if len(frequencies) > MAX_TRACKED_QUERIES:
+            _query_frequencies[view_path] = Counter(dict(frequencies.most_common(MAX_TRACKED_QUERIES // 2)))
+
+
+def get_popular_queries(view_path, count):
+    with _lock:
+        frequencies = _query_frequencies.get(view_path, Counter())
+        popular_queries = frequencies.most_common(count)
+
+    return [json.loads(query_key) for query_key, frequency in popular_queries]
+
+
+def run_prefetch_task(task_path, args):
+    module_path, function_name = task_path.rsplit(".", 1)
+    class_strings_to_class(module_path, function_name)(*args)
+
+
+def schedule_prefetch(task_path, args, key=None):
+    args = list(args)
+
+    if SEARCH_FILTER_SORT_PREFETCH_BACKEND:
+        schedule_backend_prefetch(task_path, args, key)
+        return
+
+    global _executor, _pending_jobs
+
+    with _lock:
+        # Dropping work is better than letting a queue of stale prefetches build up behind a slow database
+        if _pending_jobs >= SEARCH_FILTER_SORT_PREFETCH_MAX_PENDING:
+            _stats["dropped"] += 1
+            return
+
+        # Already being warmed for another request
+        if key is not None and key in _pending_keys:
+            _stats["deduplicated"] += 1
+            return
+
+        if key is not None:
+            _pending_keys.add(key)
+
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SEARCH_FILTER_SORT_PREFETCH_WORKERS)
+
+        _pending_jobs += 1
+        _stats["scheduled"] += 1
+
+    _executor.submit(_run_prefetch_job, task_path, args, key)
+
+
+def schedule_backend_prefetch(task_path, args, key):
+    the_time = time.time()
+
+    with _lock:
+        for pending_key in [pending_key for pending_key, expiry in _backend_pending_keys.items() if expiry <= the_time]:
+            del _backend_pending_keys[pending_key]
+
+        # Only known within this process. Other processes skip the page once it is in the cache.
+        if key is not None and key in _backend_pending_keys:
+            _stats["deduplicated"] += 1
+            return
+
+        if key is not None:
+            _backend_pending_keys[key] = the_time + SEARCH_FILTER_SORT_PREFETCH_BACKEND_PENDING_SECONDS
+
+    backend_module, backend_name = SEARCH_FILTER_SORT_PREFETCH_BACKEND.rsplit(".", 1)
+
+    try:
+        class_strings_to_class(backend_module, backend_name)(task_path, args)
+    except Exception:
+        # A queue that is down mustn't break the page that asked for the prefetch
+        logger.exception("Queueing the prefetch %s failed", task_path)
+
+        with _lock:
+            _stats["dropped"] += 1
+            _backend_pending_keys.pop(key, None)
+
+        return
+
+    record_prefetch_stat("scheduled")
+
+
+def _run_prefetch_job(task_path, args, key):
+    global _pending_jobs
+
+    try:
+        run_prefetch_task(task_path, args)
+    finally:
+        # Each pool thread has its own connections, which would otherwise stay open
+        connections.close_all()
+
+        with _lock:
+            _pending_jobs -= 1
+            _pending_keys.discard(key)
+
+
+def warm_browse_page(view_path, request_path, canonical_parameters, page_number, cache_key, cache_alias, timeout):
+    # Runs the view's query and pagination for one page without a real request and caches the primary keys of the page
+    # and the filtered count. Only meant for views whose results don't depend on the user. The request deliberately has
+    # no user or session, so a view that reads them fails here instead of caching someone else's results.
+    try:
+        module_path, class_name = view_path.rsplit(".", 1)
+        request = HttpRequest()
+        request.method = "GET"
+        request.path = request_path
+        request.GET = QueryDict(mutable=True)
+
+        for key, values in canonical_parameters:
+            request.GET.setlist(key, values)
+
+        view = class_strings_to_class(module_path, class_name)()
+        view.setup(request)
+        queryset = view.get_queryset()
+        paginator = view.get_paginator(
+            queryset, view.get_paginate_by(queryset), orphans=view.get_paginate_orphans(),
+            allow_empty_first_page=view.get_allow_empty()
+        )
+        page = paginator.page(page_number)
+        prefetched_page = {"pks": [item.pk for item in page.object_list], "count": paginator.count}
+    except InvalidPage:  # The results shrank and the page no longer exists
+        return
+    except Exception:
+        record_prefetch_stat("errors")
+        logger.exception("Prefetching page %s of %s failed", page_number, view_path)
+        return
+
+    caches[cache_alias].set(cache_key, prefetched_page, timeout)
+    record_prefetch_stat("warmed")
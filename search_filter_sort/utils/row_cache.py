@@ -0,0 +1,63 @@
+import datetime
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.timezone import get_current_timezone_name
+from django.utils.translation import get_language
+
+ROW_CACHE_KEY_PREFIX = "search_filter_sort_row"
+
+
+def get_row_cache_key(item, template_name, modification_field, vary_on=None):
+    stamp = getattr(item, modification_field, None)
+
+    # Without a modification stamp there is no way to know when the row changed, so it is never cached
+    if stamp is None:
+        return None
+
+    if isinstance(stamp, (datetime.datetime, datetime.date)):
+        stamp = stamp.isoformat()
+
+    # Rendered dates and times depend on the active language and timezone. Everything is hashed so the key stays within
+    # memcached's 250 character limit however long the template name and vary_on get.
+    key_data = json.dumps([
+        template_name, item._meta.label_lower, str(item.pk), str(stamp), get_language() or "", get_current_timezone_name(),
+        [str(part) for part in vary_on or []]
+    ])
+
+    return ROW_CACHE_KEY_PREFIX + ":" + hashlib.md5(key_data.encode("utf-8")).hexdigest()
+
+
+def render_cached_rows(template_name, object_list, context=None, request=None, modification_field="updated_at",
+                       cache_alias="default", timeout=None, vary_on=None):
+    # Rendered rows are shared between users, so anything user specific in the row template must be part of vary_on.
+    # Passing the request runs the context processors (user, perms, csrf_token, ...), so it usually means varying on the
+    # user too.
+    cache = caches[cache_alias]
+    object_list = list(object_list)
+    keys = [get_row_cache_key(item, template_name, modification_field, vary_on) for item in object_list]
+    cached_rows = cache.get_many([key for key in keys if key is not None])
+    rendered_rows = []
+    new_rows = {}
+
+    for item, key in zip(object_list, keys):
+        row = cached_rows.get(key, None) if key is not None else None
+
+        if row is None:
+            row_context = dict(context or {})
+            row_context["item"] = item
+            row_context["item_id"] = item.pk
+            row = render_to_string(template_name, row_context, request=request)
+
+            if key is not None:
+                new_rows[key] = row
+
+        rendered_rows.append(mark_safe(row))
+
+    if new_rows:
+        cache.set_many(new_rows, timeout)
+
+    return rendered_rows
@@ -1,17 +1,14 @@
-import datetime
 import operator
 import logging
 import json
-import re
-import pytz
+import time
 
 from functools import reduce
-from importlib import util
 
-from dateutil import parser
-from dateutil.tz import tz
-from django.http import Http404, HttpResponse
-from django.utils.timezone import now
+from django.core.cache import caches
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.html import escape
 from django.utils.translation import gettext
 from django.db.models import Q
 from django.http.response import HttpResponseRedirect
@@ -19,21 +16,53 @@ from django.views.generic import ListView
 from django.conf import settings
 from django.core.exceptions import FieldError
 
-PSYCOPG_FOUND = util.find_spec("psycopg") is not None
+from search_filter_sort.utils.constants import RangeFilterTypes, SessionKeys, RouterHints, LazyFilterParameters
+# USER_SEARCH_LIST, PSYCOPG_FOUND and the psycopg range classes are still importable from here
+from search_filter_sort.utils.browse_query import PSYCOPG_FOUND, USER_SEARCH_LIST, USER_SEARCH_LIST_DEFAULT, BrowseQuery, \
+    search_fields, compile_sort_registry
+from search_filter_sort.utils.pagination import WindowCountPaginator
+from search_filter_sort.utils.prefetch import WARM_BROWSE_PAGE_TASK, get_canonical_parameters, get_popular_queries, \
+    get_prefetch_cache_key, record_prefetch_stat, record_query, schedule_prefetch
+from search_filter_sort.utils.row_cache import render_cached_rows
 
 if PSYCOPG_FOUND:
     from psycopg.types.range import TimestamptzRange, NumericRange
 
-from search_filter_sort.utils.constants import RangeFilterTypes, PostgresRangeQueryFilterTypes
-from search_filter_sort.utils.misc import class_strings_to_class, convert_age_to_date
-
 logger = logging.getLogger(__name__)
-USER_SEARCH_LIST_DEFAULT = ["username", "first_name", "last_name", "email"]
 
-if hasattr(settings, "USER_SEARCH_LIST"):
-    USER_SEARCH_LIST = settings.USER_SEARCH_LIST
+# Database alias used for all browse reads. None leaves the choice to the DATABASE_ROUTERS, which receive the
+# RouterHints.BROWSE hint so browse traffic can be sent to a read replica.
+if hasattr(settings, "SEARCH_FILTER_SORT_DATABASE"):
+    SEARCH_FILTER_SORT_DATABASE = settings.SEARCH_FILTER_SORT_DATABASE
+else:
+    SEARCH_FILTER_SORT_DATABASE = None
+
+if hasattr(settings, "SEARCH_FILTER_SORT_PRIMARY_DATABASE"):
+    SEARCH_FILTER_SORT_PRIMARY_DATABASE = settings.SEARCH_FILTER_SORT_PRIMARY_DATABASE
+else:
+    SEARCH_FILTER_SORT_PRIMARY_DATABASE = "default"
+
+if hasattr(settings, "SEARCH_FILTER_SORT_READ_YOUR_WRITES_SECONDS"):
+    SEARCH_FILTER_SORT_READ_YOUR_WRITES_SECONDS = settings.SEARCH_FILTER_SORT_READ_YOUR_WRITES_SECONDS
 else:
-    USER_SEARCH_LIST = USER_SEARCH_LIST_DEFAULT
+    SEARCH_FILTER_SORT_READ_YOUR_WRITES_SECONDS = 10
+
+if hasattr(settings, "SEARCH_FILTER_SORT_ROW_CACHE_TIMEOUT"):
+    SEARCH_FILTER_SORT_ROW_CACHE_TIMEOUT = settings.SEARCH_FILTER_SORT_ROW_CACHE_TIMEOUT
+else:
+    SEARCH_FILTER_SORT_ROW_CACHE_TIMEOUT = 60 * 60
+
+if hasattr(settings, "SEARCH_FILTER_SORT_PREFETCH_TIMEOUT"):
+    SEARCH_FILTER_SORT_PREFETCH_TIMEOUT = settings.SEARCH_FILTER_SORT_PREFETCH_TIMEOUT
+else:
+    SEARCH_FILTER_SORT_PREFETCH_TIMEOUT = 60
+
+# BrowseQuery methods that used to live on the view. Subclasses that override them on the view still take part in the
+# query (see get_browse_query).
+BROWSE_QUERY_HOOKS = [
+    "get_search_list", "get_filter_list", "get_sort_list", "convert_values", "create_psycopg2_range_object_list",
+    "create_or_edit_postgres_range_filter_dictionary"
+]
 
 
 class BaseBrowseView(ListView):
@@ -43,18 +72,39 @@ class BaseBrowseView(ListView):
     searches = []
     filters = []
     filter_names = []
+    # Filter name to {"model": ..., "value_field": ..., "label_field": ..., "search_fields": [...], "page_size": ...}.
+    # Only model is required. Override get_lazy_filter for anything a model alone can't express.
+    lazy_filters = {}
     sorts = []
+    sort_registry = {}
     default_sort_by = ["-id"]
     default_pagination = 25
+    use_window_count_pagination = False
     deferments = []
     show_all_in_filter = True
     show_clear_sorts = True
     using_postgres = False
+    use_multirange_filters = True
     postgres_filter_name_query_filter_type_map = {}
+    using = SEARCH_FILTER_SORT_DATABASE
+    primary_using = SEARCH_FILTER_SORT_PRIMARY_DATABASE
+    read_your_writes_seconds = SEARCH_FILTER_SORT_READ_YOUR_WRITES_SECONDS
+    row_template_name = None
+    row_cache_modification_field = "updated_at"
+    row_cache_alias = "default"
+    row_cache_timeout = SEARCH_FILTER_SORT_ROW_CACHE_TIMEOUT
+    render_rows_with_request = False
+    use_prefetch = False
+    prefetch_popular_query_count = 0
+    prefetch_cache_alias = "default"
+    prefetch_timeout = SEARCH_FILTER_SORT_PREFETCH_TIMEOUT
 
     search_by = None
     using_filters = None
-    filtered_object_count = None
+    browse_query_class = BrowseQuery
+    browse_query = None
+    browse_result = None
+    _filtered_object_count = None
 
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -90,6 +140,130 @@ class BaseBrowseView(ListView):
                 "request_path": "{request_path}?{url_args}".format(request_path=request.path, url_args=url_args.urlencode())
             }), content_type="application/json")
 
+    def get(self, request, *args, **kwargs):
+        lazy_filter_name = request.GET.get(LazyFilterParameters.FILTER_NAME, None)
+
+        # Option requests from lazy select filters are answered with JSON instead of the browse page
+        if lazy_filter_name is not None:
+            return self.get_lazy_filter_options_response(lazy_filter_name)
+
+        # Prefetched pages are found by the path and the GET parameters and warmed without the URL's arguments, so they
+        # would be wrong for views that take any (including the page)
+        if self.use_prefetch and kwargs:
+            raise Exception("use_prefetch can't be used on views that take URL arguments")
+
+        response = super(BaseBrowseView, self).get(request, *args, **kwargs)
+
+        if self.use_prefetch:
+            page_obj = (getattr(response, "context_data", None) or {}).get("page_obj", None)
+            # The server closes the response once it has been sent, so the scheduling doesn't hold up this response
+            response._resource_closers.append(lambda: self.schedule_prefetches(page_obj))
+
+        return response
+
+    def get_prefetch_view_path(self):
+        return self.__class__.__module__ + "." + self.__class__.__name__
+
+    def get_prefetch_cache_key(self, request_path, canonical_parameters, page_number):
+        return get_prefetch_cache_key(self.get_prefetch_view_path(), request_path, canonical_parameters, page_number)
+
+    def schedule_prefetches(self, page_obj):
+        try:
+            self.schedule_prefetch_targets(page_obj)
+        except Exception:
+            # The response has already been sent, so there is nobody left to show the error to
+            logger.exception("BaseBrowseView: Scheduling prefetches for %s failed", self.request.get_full_path())
+
+    def schedule_prefetch_targets(self, page_obj):
+        # Warms the cache with the next page and with the first page of the most frequent queries. The work runs in the
+        # background (see search_filter_sort.utils.prefetch).
+        view_path = self.get_prefetch_view_path()
+        canonical_parameters = get_canonical_parameters(self.request.GET)
+        record_query(view_path, self.request.path, canonical_parameters)
+        prefetch_targets = []
+
+        if page_obj is not None and page_obj.has_next():
+            prefetch_targets.append((self.request.path, canonical_parameters, page_obj.next_page_number()))
+
+        for request_path, popular_canonical_parameters in get_popular_queries(view_path, self.prefetch_popular_query_count):
+            prefetch_targets.append((request_path, popular_canonical_parameters, 1))
+
+        prefetch_targets = {self.get_prefetch_cache_key(*prefetch_target): prefetch_target for prefetch_target in prefetch_targets}
+        cached_pages = caches[self.prefetch_cache_alias].get_many(list(prefetch_targets.keys()))
+
+        for cache_key, (request_path, target_canonical_parameters, page_number) in prefetch_targets.items():
+            if cache_key not in cached_pages:
+                schedule_prefetch(WARM_BROWSE_PAGE_TASK, [
+                    view_path, request_path, target_canonical_parameters, page_number, cache_key, self.prefetch_cache_alias,
+                    self.prefetch_timeout
+                ], cache_key)
+
+    def get_prefetched_page(self, queryset, page_size):
+        try:
+            page_number = int(self.request.GET.get(self.page_kwarg) or 1)
+        except ValueError:
+            return None
+
+        cache_key = self.get_prefetch_cache_key(self.request.path, get_canonical_parameters(self.request.GET), page_number)
+        prefetched_page = caches[self.prefetch_cache_alias].get(cache_key)
+
+        if prefetched_page is None:
+            record_prefetch_stat("misses")
+            return None
+
+        paginator = self.get_paginator(
+            queryset, page_size, orphans=self.get_paginate_orphans(), allow_empty_first_page=self.get_allow_empty()
+        )
+        paginator.__dict__["count"] = prefetched_page["count"]
+        positions = {pk: position for position, pk in enumerate(prefetched_page["pks"])}
+        object_list = sorted(queryset.filter(pk__in=prefetched_page["pks"]), key=lambda item: positions[item.pk])
+
+        try:
+            page_number = paginator.validate_number(page_number)
+        except InvalidPage:
+            object_list = None
+
+        # Rows were deleted (or the page is gone) since the page was prefetched
+        if object_list is None or len(object_list) != len(positions):
+            record_prefetch_stat("misses")
+            return None
+
+        record_prefetch_stat("hits")
+        page = paginator._get_page(object_list, page_number, paginator)
+
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        if self.use_window_count_pagination:
+            return WindowCountPaginator(queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs)
+
+        return super(BaseBrowseView, self).get_paginator(queryset, per_page, orphans, allow_empty_first_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        # Right after a write the prefetched pages may be stale, so they are skipped
+        if self.use_prefetch and not self.has_recent_write():
+            prefetched_page = self.get_prefetched_page(queryset, page_size)
+
+            if prefetched_page is not None:
+                return prefetched_page
+
+        if not self.use_window_count_pagination:
+            return super(BaseBrowseView, self).paginate_queryset(queryset, page_size)
+
+        # The page rows and the filtered count come back in one query. Invalid or out of range pages show the closest
+        # page instead of raising Http404 (and going through the invalid page JSON in dispatch).
+        paginator = self.get_paginator(
+            queryset, page_size, orphans=self.get_paginate_orphans(), allow_empty_first_page=self.get_allow_empty()
+        )
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+
+        if page_number == "last":
+            page_number = paginator.num_pages
+
+        page = paginator.get_page(page_number)
+
+        return paginator, page, page.object_list, page.has_other_pages()
+
     def get_context_data(self, **kwargs):
         context = super(BaseBrowseView, self).get_context_data(**kwargs)
         # check_search_fields()
@@ -100,225 +274,176 @@ class BaseBrowseView(ListView):
         context["filter_names"] = self.filter_names
         context["using_filters"] = self.using_filters
         context["default_pagination"] = self.default_pagination
+        # Reuse the paginator's count instead of counting the filtered queryset again
+        if self.browse_result is not None and context["paginator"] is not None and self._filtered_object_count is None:
+            self.browse_result.__dict__["filtered_object_count"] = context["paginator"].count
+
         context["filtered_object_count"] = self.filtered_object_count
-        context["total_object_count"] = self.model.objects.count()
+
+        # browse_result is only missing when a subclass replaces get_queryset entirely
+        if self.browse_result is not None:
+            context["total_object_count"] = self.browse_result.total_object_count
+        else:
+            context["total_object_count"] = self.get_browse_queryset().count()
+
         context["show_all_in_filter"] = self.show_all_in_filter
         context["show_clear_sorts"] = self.show_clear_sorts
         page_obj = context["page_obj"]
         context["pagination_page_navigation_range"] = list(range(page_obj.number - 3, page_obj.number + 4))
 
+        if self.row_template_name:
+            context["rendered_rows"] = self.get_rendered_rows(context["object_list"])
+
         return context
 
+    def get_rendered_rows(self, object_list):
+        # Each row is cached by model, pk, modification stamp, language and timezone, so only changed rows get rendered
+        # again. Rows are rendered without the request (so without context processors) unless render_rows_with_request
+        # is set, in which case they are also cached per user.
+        return render_cached_rows(
+            self.row_template_name, object_list, context=self.get_row_context(),
+            request=self.request if self.render_rows_with_request else None,
+            modification_field=self.row_cache_modification_field, cache_alias=self.row_cache_alias,
+            timeout=self.row_cache_timeout, vary_on=self.get_row_cache_vary_on()
+        )
+
+    def get_row_context(self):
+        return {}
+
+    def get_row_cache_vary_on(self):
+        # Override if the row template depends on anything beyond the row itself and get_row_context
+        if not self.render_rows_with_request:
+            return []
+
+        # Context processors add the user, their permissions and the CSRF token
+        user = getattr(self.request, "user", None)
+
+        return ["user", user.pk if user is not None else None]
+
+    def get_database_alias(self):
+        # Right after the user wrote something (see mark_recent_write) read from the primary so they see their changes
+        if self.has_recent_write():
+            return self.primary_using
+
+        return self.using
+
+    def has_recent_write(self):
+        session = getattr(self.request, "session", None)
+
+        if session is None or not self.read_your_writes_seconds:
+            return False
+
+        last_write = session.get(SessionKeys.LAST_WRITE, None)
+
+        if last_write is None:
+            return False
+
+        return time.time() - last_write < self.read_your_writes_seconds
+
+    def get_browse_queryset(self, model=None):
+        # All browse reads (including filter option lookups in define_filters) should start from here so they are
+        # routed to the browse database
+        if model is None:
+            model = self.model
+
+        return model.objects.db_manager(self.get_database_alias(), hints={RouterHints.BROWSE: True}).all()
+
     def get_queryset_error_handler(self):
         # Called if filter provide in query string is incorrect. Can be modified by child classes.
         pass
 
     def get_queryset(self):
-        self.searches = self.search_fields(self.model, [])
-
         if not self.should_override_pagination:
             try:
                 self.paginate_by = int(self.request.GET.get("paginate_by", self.default_pagination))
             except:
                 self.paginate_by = self.default_pagination
 
-        should_return_empty = self.request.GET.get("__RETURN_EMPTY__", None)
+        self.define_filters()
+        self.browse_query = self.get_browse_query()
+        self.browse_result = self.browse_query.run(self.request.GET)
+        self.search_by = self.browse_result.search_by
+        self.using_filters = self.browse_result.using_filters
 
-        if should_return_empty:
-            return self.model.objects.none()
+        return self.browse_result.queryset
 
-        search_bys = self.request.GET.get("search_by", None)
-        filter_names = self.request.GET.getlist("filter_name", None)
-        filter_values = self.request.GET.getlist("filter_value", None)
-        sort_bys = self.request.GET.getlist("sort_by", self.default_sort_by)
+    @property
+    def filtered_object_count(self):
+        # Counted lazily, so pages that get the count from the paginator don't count twice
+        if self._filtered_object_count is None and self.browse_result is not None:
+            return self.browse_result.filtered_object_count
 
-        if not sort_bys:
-            raise ValueError("The default sort by is not in the view's sorts list")
+        return self._filtered_object_count
 
-        search_list = self.get_search_list(search_bys)
-        filter_list = self.get_filter_list(filter_names, filter_values)
-        sort_list = self.get_sort_list(sort_bys)
+    @filtered_object_count.setter
+    def filtered_object_count(self, filtered_object_count):
+        self._filtered_object_count = filtered_object_count
 
-        # Search, filter, sort
-        if search_list:
-            list_of_search_bys_Q = [Q(**{key: value}) for key, value in search_list.items()]
-            search_reduce = reduce(operator.or_, list_of_search_bys_Q)
-        else:
-            search_reduce = None
+    @classmethod
+    def get_compiled_sort_registry(cls):
+        # Compiled once per view class, not per request, from the class's sorts and sort_registry. Changing those on the
+        # class after the first request has no effect. Setting them on the instance is handled in get_browse_query.
+        if "_compiled_sort_registry" not in cls.__dict__:
+            cls._compiled_sort_registry = compile_sort_registry(cls.sorts, cls.sort_registry)
 
-        if filter_list:
-            list_of_filter_bys_Q = [[Q(**{key: value}) for value in array] for key, array in filter_list.items()]
-            reduced_filters = []
+        return cls._compiled_sort_registry
 
-            for array in list_of_filter_bys_Q:
-                reduced_filters.append(reduce(operator.or_, array))
+    def get_browse_query(self):
+        # define_filters() has to be called first since add_range_filter fills in the postgres range comparison types
+        self.searches = self.search_fields(self.model, [])
 
-            filter_reduce = reduce(operator.and_, reduced_filters)
-            self.using_filters = True
-        else:
-            filter_reduce = None
-            self.using_filters = False
-
-        if search_reduce and filter_reduce:
-            queryset = self.model.objects.filter(search_reduce).filter(filter_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
-        elif search_reduce:
-            queryset = self.model.objects.filter(search_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
-        elif filter_reduce:
-            queryset = self.model.objects.filter(filter_reduce).defer(*self.deferments).distinct().order_by(*sort_list)
+        # Sorts set on the instance (in setup, define_filters, ...) can't use the registry compiled for the class
+        if "sorts" in self.__dict__ or "sort_registry" in self.__dict__:
+            compiled_sort_registry = compile_sort_registry(self.sorts, self.sort_registry)
         else:
-            queryset = self.model.objects.defer(*self.deferments).order_by(*sort_list)
-            # queryset = sorted(self.model.objects.all(), key=lambda x: [int(t) if t.isdigit() else t.lower() for t in re.split('(\d+)', x.name)])
+            compiled_sort_registry = self.get_compiled_sort_registry()
+
+        browse_query = self.browse_query_class(
+            self.model,
+            sorts=self.sorts,
+            compiled_sort_registry=compiled_sort_registry,
+            default_sort_by=self.default_sort_by,
+            deferments=self.deferments,
+            searches=self.searches,
+            using_postgres=self.using_postgres,
+            use_multirange_filters=self.use_multirange_filters,
+            postgres_filter_name_query_filter_type_map=self.postgres_filter_name_query_filter_type_map,
+            queryset=self.get_browse_queryset()
+        )
 
-        # TODO: Find a way to natural sort the queryset
-        # SELECT * FROM job
-        # ORDER BY(substring('name', '^[0-9]+'))::int -- cast to integer\
-        #     , coalesce(substring('name', '[^0-9_].*$'), '')
+        for hook_name in BROWSE_QUERY_HOOKS:
+            if getattr(type(self), hook_name) is not getattr(BaseBrowseView, hook_name):
+                setattr(browse_query, hook_name, getattr(self, hook_name))
 
-        self.filtered_object_count = queryset.count()
+        return browse_query
 
-        return queryset
+    def call_browse_query(self, method_name, *args):
+        if self.browse_query is None:
+            self.browse_query = self.get_browse_query()
 
-    def get_search_list(self, search_bys):
-        # Determine search_list
-        search_list = {}
+        # Called on the class so an override on the view (set on the instance in get_browse_query) isn't called again
+        return getattr(type(self.browse_query), method_name)(self.browse_query, *args)
 
-        if search_bys:
-            self.search_by = search_bys
+    def get_search_list(self, search_bys):
+        return self.call_browse_query("get_search_list", search_bys)
 
-            for field in self.searches:
-                field += "__icontains"
-                search_list[field] = search_bys
-        else:
-            self.search_by = ""
+    def get_filter_list(self, filter_names, filter_values):
+        return self.call_browse_query("get_filter_list", filter_names, filter_values)
 
-        return search_list
+    def get_sort_list(self, sort_bys):
+        return self.call_browse_query("get_sort_list", sort_bys)
 
-    def get_filter_list(self, filter_names, filter_values):
-        # Determine filter_list
-        filter_list = {}
-        self.define_filters()
+    def convert_values(self, values, range_type):
+        return self.call_browse_query("convert_values", values, range_type)
 
-        postgres_range_filter_dictionaries = {}
-        datetime_range_filter_dictionaries = {}
-
-        for i in range(len(filter_names)):
-            filter_name = filter_names[i]
-
-            # This is only false if there are more filter_names than filter_values. Should be equal.
-            if i < len(filter_values):
-                values = filter_values[i].split(",")
-                split_regex = re.compile("__lte|__lt|__gte|__gt")
-                split_filter_name = split_regex.split(filter_name)
-                filter_type = next(iter(split_regex.findall(filter_name)), None)
-                stripped_filter_name = split_filter_name[0]
-                stripped_filter_info = None
-
-                if len(split_filter_name) != 1:
-                    stripped_filter_info = split_filter_name[1].replace("_", "", 1)
-
-                if stripped_filter_info:
-                    if RangeFilterTypes.DATETIME in stripped_filter_info:
-                        dates_or_times = stripped_filter_info.split("_")[1] + "s"
-                        new_filter_name = stripped_filter_name + filter_type
-
-                        if not datetime_range_filter_dictionaries.get(new_filter_name, None):
-                            datetime_range_filter_dictionaries[new_filter_name] = {
-                                "times": [],
-                                "dates": [],
-                                "filter_type": filter_type
-                            }
-
-                        datetime_range_filter_dictionaries[new_filter_name][dates_or_times] = self.convert_values(values, stripped_filter_info.split("_")[1])
-                        continue
-
-                    if self.using_postgres:
-                        self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, stripped_filter_name, filter_type, stripped_filter_info, values)
-                    else:
-                        if stripped_filter_info == RangeFilterTypes.AGE:
-                            values = [convert_age_to_date(int(filter_values[i]))]
-
-                        if filter_type:
-                            filter_name = stripped_filter_name + filter_type
-
-                        filter_list[filter_name] = self.convert_values(values, stripped_filter_info)
-                else:
-                    if filter_type:
-                        filter_name = stripped_filter_name + filter_type
-
-                    filter_list[filter_name] = self.convert_values(values, stripped_filter_info)
-            else:
-                break
-
-        for datetime_range_filter_name_and_type, datetime_range_filter_date_and_time_values in datetime_range_filter_dictionaries.items():
-            filter_name = "__".join(datetime_range_filter_name_and_type.split("__")[0:-1])
-            filter_type = datetime_range_filter_date_and_time_values["filter_type"]
-            datetime_values = []
-            dates = datetime_range_filter_date_and_time_values["dates"]
-            times = datetime_range_filter_date_and_time_values["times"]
-
-            if not dates:
-                self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, filter_name, filter_type, RangeFilterTypes.DATETIME, [])
-                continue
-            if not times:
-                times = [date for date in dates]
-
-            date_time_pairs = zip(dates, times)
-
-            for date_time_pair in date_time_pairs:
-                datetime_values.append(str(tz.resolve_imaginary(datetime.datetime.combine(date_time_pair[0].date(), date_time_pair[1].time())).replace(tzinfo=date_time_pair[0].tzinfo)))
-
-            if self.using_postgres:
-                self.create_or_edit_postgres_range_filter_dictionary(postgres_range_filter_dictionaries, filter_name, filter_type, RangeFilterTypes.DATETIME, datetime_values)
-            else:
-                filter_list[filter_name] = self.convert_values(datetime_values, RangeFilterTypes.DATETIME)
-
-        for postgres_range_filter_name, postgres_range_filter_dictionary in postgres_range_filter_dictionaries.items():
-            postgres_query_filter_type = self.postgres_filter_name_query_filter_type_map.get(postgres_range_filter_name, PostgresRangeQueryFilterTypes.CONTAINED_BY)
-            query_filter_name = postgres_range_filter_name + postgres_query_filter_type
-            lowers = postgres_range_filter_dictionary["lowers"]
-            uppers = postgres_range_filter_dictionary["uppers"]
-            range_type = postgres_range_filter_dictionary["range_type"]
-            lower_bound = postgres_range_filter_dictionary.get("lower_bound", "[")
-            upper_bound = postgres_range_filter_dictionary.get("upper_bound", "]")
-
-            if not lower_bound:
-                lower_bound = "["
-
-            if not upper_bound:
-                upper_bound = "]"
-
-            bounds_string = lower_bound + upper_bound
-            filter_list[query_filter_name] = self.create_psycopg2_range_object_list(lowers, uppers, range_type, bounds_string)
-
-        return filter_list
+    def create_psycopg2_range_object_list(self, lower_bounds, upper_bounds, range_type, bounds_string):
+        return self.call_browse_query("create_psycopg2_range_object_list", lower_bounds, upper_bounds, range_type, bounds_string)
 
-    def get_sort_list(self, sort_bys):
-        # Determine sort_list
-        sort_list = list(sort_bys)
-        count = 0
-
-        for i in range(len(sort_bys)):
-            if "-" in sort_bys[i]:
-                base_sort = sort_bys[i].split("-")[1]
-            else:
-                base_sort = sort_bys[i]
-
-            if base_sort not in self.sorts:
-                sort_list.remove(sort_bys[i])
-                logger.debug("Sort of " + base_sort + " is not in the sorts.")
-                count -= 1
-            elif "last_name" in sort_bys[i]:  # Special clause for last_names/first_names
-                sort_list.insert(count, sort_bys[i].replace("last_name", "first_name"))
-                count += 1
-            elif base_sort == "birthday":  # Special clause for birthday/age. Need to reverse order because it is backwards for some reason.
-                if sort_bys[i] == "birthday":
-                    sort_list[count] = "-birthday"
-                else:
-                    sort_list[count] = "birthday"
-
-            count += 1
-
-        return sort_list
+    def create_or_edit_postgres_range_filter_dictionary(self, postgres_range_filter_dictionaries, filter_name, filter_type, range_type, values):
+        return self.call_browse_query(
+            "create_or_edit_postgres_range_filter_dictionary", postgres_range_filter_dictionaries, filter_name, filter_type,
+            range_type, values
+        )
 
     def define_filters(self):
         self.filters = []
@@ -338,6 +463,121 @@ class BaseBrowseView(ListView):
 
         self.filter_names.append(filter_name)
 
+    def add_lazy_select_filter(self, html_name, filter_name):
+        # Like add_select_filter, but only the currently selected options are rendered. The rest are fetched page by page
+        # (and searched) from get_lazy_filter_options_response when the user opens the filter.
+        lazy_filter = self.get_lazy_filter(filter_name)
+
+        if lazy_filter is None:
+            raise Exception("Lazy filter " + filter_name + " is not in the view's lazy filters")
+
+        options_url = "{request_path}?{parameter}={filter_name}".format(
+            request_path=self.request.path, parameter=LazyFilterParameters.FILTER_NAME, filter_name=filter_name
+        )
+        html_code = '<input type="text" class="form-control form-control-sm sfs-lazy-filter-search" id="' + filter_name + '_filter_search" ' + \
+            'placeholder="' + escape(gettext("Search")) + '" autocomplete="off" />'
+        html_code += '<select class="multi-select form-control sfs-filter sfs-lazy-filter" id="' + filter_name + '_filter" name="' + filter_name + '_filter" ' + \
+            'data-options-url="' + escape(options_url) + '" autocomplete="off" multiple>'
+
+        for value, label in self.get_selected_lazy_filter_options(filter_name, lazy_filter):
+            html_code += '<option value="' + escape(value) + '">' + escape(label) + '</option>'
+
+        html_code += '</select>'
+
+        self.filters.append(
+            {
+                "filter_name": filter_name,
+                "html_name": html_name,
+                "html_code": html_code
+            }
+        )
+
+        self.filter_names.append(filter_name)
+
+    def get_lazy_filter(self, filter_name):
+        # Option requests only build the filter they ask for, without going through define_filters
+        lazy_filter_spec = self.lazy_filters.get(filter_name, None)
+
+        if lazy_filter_spec is None:
+            return None
+
+        return self.create_lazy_filter(
+            self.get_browse_queryset(lazy_filter_spec["model"]),
+            **{key: value for key, value in lazy_filter_spec.items() if key != "model"}
+        )
+
+    def create_lazy_filter(self, queryset, value_field="pk", label_field=None, search_fields=None, page_size=50):
+        if search_fields is None:
+            search_fields = [label_field] if label_field else []
+
+        return {
+            "queryset": queryset,
+            "value_field": value_field,
+            "label_field": label_field,
+            "search_fields": search_fields,
+            "page_size": page_size
+        }
+
+    def get_selected_lazy_filter_options(self, filter_name, lazy_filter):
+        filter_names = self.request.GET.getlist("filter_name")
+        filter_values = self.request.GET.getlist("filter_value")
+        selected_values = []
+
+        for i in range(min(len(filter_names), len(filter_values))):
+            if filter_names[i] == filter_name:
+                selected_values += [value for value in filter_values[i].split(",") if value]
+
+        if not selected_values:
+            return []
+
+        queryset = lazy_filter["queryset"].filter(**{lazy_filter["value_field"] + "__in": [
+            value for value in selected_values if not (value.startswith("__") and value.endswith("__"))
+        ]})
+        labels = {str(value): label for value, label in self.get_lazy_filter_option_pairs(queryset, lazy_filter)}
+
+        # Special values such as __NONE__ aren't rows, so they are shown as they are
+        return [(value, labels.get(value, value)) for value in selected_values]
+
+    def get_lazy_filter_option_pairs(self, queryset, lazy_filter, start=None, stop=None):
+        if lazy_filter["label_field"]:
+            return list(queryset.values_list(lazy_filter["value_field"], lazy_filter["label_field"])[start:stop])
+
+        return [(getattr(item, lazy_filter["value_field"]), str(item)) for item in queryset[start:stop]]
+
+    def get_lazy_filter_options_response(self, filter_name):
+        lazy_filter = self.get_lazy_filter(filter_name)
+
+        if lazy_filter is None:
+            return JsonResponse({"results": [], "has_more": False}, status=404)
+
+        try:
+            options_page = max(int(self.request.GET.get(LazyFilterParameters.PAGE, 1)), 1)
+        except ValueError:
+            options_page = 1
+
+        options_search = self.request.GET.get(LazyFilterParameters.SEARCH, "")
+        queryset = lazy_filter["queryset"]
+
+        if options_search and lazy_filter["search_fields"]:
+            queryset = queryset.filter(reduce(operator.or_, [
+                Q(**{search_field + "__icontains": options_search}) for search_field in lazy_filter["search_fields"]
+            ]))
+
+        if not queryset.ordered:
+            queryset = queryset.order_by(lazy_filter["label_field"] or lazy_filter["value_field"])
+
+        page_size = lazy_filter["page_size"]
+        start = (options_page - 1) * page_size
+
+        # Fetch one extra row to know if there is another page without having to count
+        option_pairs = self.get_lazy_filter_option_pairs(queryset, lazy_filter, start, start + page_size + 1)
+
+        return JsonResponse({
+            "results": [{"value": str(value), "label": str(label)} for value, label in option_pairs[:page_size]],
+            "has_more": len(option_pairs) > page_size,
+            "page": options_page
+        })
+
     def add_range_filter(self, html_name, filter_name, filter_type, step_size="1", bounds="[]", postgres_range_field_comparison_type=None):
         lower_bound = bounds[0]
         upper_bound = bounds[1]
@@ -406,112 +646,4 @@ class BaseBrowseView(ListView):
         )
 
     def search_fields(self, class_object, list_of_used_classes):
-        object_search_list = []
-
-        if class_object in list_of_used_classes:
-            return []
-        else:
-            list_of_used_classes.append(class_object)
-
-        if class_object.__name__ == "User":
-            search_list = [search_item for search_item in USER_SEARCH_LIST]
-        else:
-            object_dependencies = class_object.object_dependencies()
-
-            for object_dependency in object_dependencies:
-                if object_dependency[2] == "User":
-                    object_search_list += [
-                        str(object_dependency[0] + "__{0}").format(search_item) for search_item in USER_SEARCH_LIST
-                    ]
-                else:
-                    other_class_object = class_strings_to_class(object_dependency[1], object_dependency[2])
-                    other_object_search_list = self.search_fields(other_class_object, list_of_used_classes)
-                    object_search_list += [
-                        str(object_dependency[0] + "__{0}").format(search_item) for search_item in other_object_search_list
-                    ]
-
-            search_list = class_object.basic_search_list() + class_object.special_search_list() + object_search_list
-
-        return search_list
-
-    def convert_values(self, values, range_type):
-        the_now = now()
-        if settings.TIME_ZONE:
-            timezone = pytz.timezone(settings.TIME_ZONE)
-            the_now = the_now.astimezone(timezone)
-
-        current_time_zone = the_now.strftime("%z")
-        new_values = []
-
-        for value in values:
-            if value == "__NONE_OR_BLANK__":
-                new_values.append("")
-                value = None
-            elif value == "__NONE__":
-                value = None
-            elif value == "__BLANK__":
-                value = ""
-            elif value == "__TRUE__":
-                value = True
-            elif value == "__FALSE__":
-                value = False
-            elif range_type == RangeFilterTypes.DATE:
-                value = parser.parse(value + " 00:00:00" + current_time_zone)
-            elif range_type == RangeFilterTypes.TIME:
-                value = parser.parse(value)
-            elif range_type in [RangeFilterTypes.NUMBER, RangeFilterTypes.AGE]:
-                try:
-                    value = int(value)
-                except ValueError:
-                    value = float(value)
-
-            new_values.append(value)
-
-        return new_values
-
-    def create_psycopg2_range_object_list(self, lower_bounds, upper_bounds, range_type, bounds_string):
-        bound_value_length = max(len(lower_bounds), len(upper_bounds))
-
-        if not lower_bounds:
-            lower_bounds = [None for i in range(0, bound_value_length)]
-
-        if not upper_bounds:
-            upper_bounds = [None for i in range(0, bound_value_length)]
-
-        lower_and_upper_pairs = zip(lower_bounds, upper_bounds)
-        if range_type in [RangeFilterTypes.DATETIME, RangeFilterTypes.DATE, RangeFilterTypes.TIME]:
-            TZ_RANGE_OBJECT = TimestamptzRange
-        elif range_type in [RangeFilterTypes.NUMBER, RangeFilterTypes.AGE]:
-            TZ_RANGE_OBJECT = NumericRange
-        else:
-            raise Exception("Range Type of " + range_type + "does not map to any current psycopg2 range object")
-
-        return [TZ_RANGE_OBJECT(lower_and_upper_pair[0], lower_and_upper_pair[1], bounds=bounds_string) for lower_and_upper_pair in lower_and_upper_pairs]
-
-    def create_or_edit_postgres_range_filter_dictionary(self, postgres_range_filter_dictionaries, filter_name, filter_type, range_type, values):
-        if not postgres_range_filter_dictionaries.get(filter_name, None):
-            postgres_range_filter_dictionaries[filter_name] = {
-                "lowers": [],
-                "uppers": [],
-                "range_type": range_type,
-                "lower_bound": None,
-                "upper_bound": None
-            }
-
-        if "g" in filter_type:
-            upper_or_lower_bound = "lower"
-            bound_character = "("
-
-            if "te" in filter_type:
-                bound_character = "["
-        elif "l" in filter_type:
-            upper_or_lower_bound = "upper"
-            bound_character = ")"
-
-            if "te" in filter_type:
-                bound_character = "]"
-        else:
-            raise Exception("Invalid bound of " + filter_type)
-
-        postgres_range_filter_dictionaries[filter_name][upper_or_lower_bound + "_bound"] = bound_character
-        postgres_range_filter_dictionaries[filter_name][upper_or_lower_bound + "s"] = self.convert_values(values, range_type)
+        return search_fields(class_object, list_of_used_classes)